@@ -3,11 +3,12 @@ Flask API Server for AI Video Generation Platform
 Provides REST API endpoints for frontend React application
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import os
 import sys
 import time
+import json
 from typing import List, Dict
 from pathlib import Path
 
@@ -77,6 +78,16 @@ def internal_error(e):
 # Store conversation history per session
 conversation_sessions: Dict[str, List[Dict[str, str]]] = {}
 
+# Shared chatbot so per-session Gemini chats and cached history survive across requests
+_chatbot = None
+
+
+def get_chatbot() -> ChatbotEngine:
+    global _chatbot
+    if _chatbot is None:
+        _chatbot = ChatbotEngine()
+    return _chatbot
+
 # Initialize HuggingFace service
 try:
     hf_service = HuggingFaceService()
@@ -220,7 +231,7 @@ def chat():
         })
         
         # Generate AI response using chatbot engine
-        chatbot = ChatbotEngine()
+        chatbot = get_chatbot()
         ai_response = chatbot.get_response(user_message, session_id, mode)
         
         # Add AI response to history
@@ -246,6 +257,61 @@ def chat():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Expected JSON body: same as /api/chat
+    
+    Emits `data: {"chunk": "..."}` events as the reply is generated,
+    followed by `data: {"done": true, "timestamp": "ISO timestamp"}`
+    """
+    data = request.get_json()
+    
+    if not data or 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    user_message = data['message']
+    session_id = data.get('sessionId', 'default')
+    mode = data.get('mode', 'smart')
+    
+    conversation_history = conversation_sessions.setdefault(session_id, [])
+    conversation_history.append({
+        'role': 'user',
+        'content': user_message
+    })
+    
+    def generate():
+        from datetime import datetime
+        
+        chunks = []
+        try:
+            chatbot = get_chatbot()
+            for chunk in chatbot.stream_response(user_message, session_id, mode):
+                chunks.append(chunk)
+                yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+        except Exception as e:
+            print(f"Error in chat stream endpoint: {str(e)}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+        
+        conversation_history.append({
+            'role': 'assistant',
+            'content': ''.join(chunks)
+        })
+        if len(conversation_history) > 20:
+            conversation_sessions[session_id] = conversation_history[-20:]
+        
+        yield f"data: {json.dumps({'done': True, 'timestamp': datetime.now().isoformat(), 'mode': mode})}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/chat/clear', methods=['POST'])
 def clear_chat():
     """
@@ -905,6 +971,32 @@ def hf_image_to_video():
         }), 500
 
 
+def run_production_server(port: int):
+    """Serve the app with an async-capable server, falling back to Waitress"""
+    try:
+        import asyncio
+        from asgiref.wsgi import WsgiToAsgi
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        
+        config = Config()
+        config.bind = [f"0.0.0.0:{port}"]
+        print("🚀 Starting Hypercorn ASGI server")
+        asyncio.run(serve(WsgiToAsgi(app), config))
+        return True
+    except ImportError:
+        pass
+    
+    try:
+        from waitress import serve
+        print("🚀 Starting Waitress server")
+        serve(app, host='0.0.0.0', port=port, threads=int(os.environ.get('WAITRESS_THREADS', 8)))
+        return True
+    except ImportError:
+        print("Install hypercorn or waitress for better performance: pip install hypercorn asgiref")
+        return False
+
+
 if __name__ == '__main__':
     # Check for environment variables
     env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -924,6 +1016,7 @@ if __name__ == '__main__':
     print("  GET  /api/config/keys - Get API keys")
     print("  GET  /api/config/health - Check API key health")
     print("  POST /api/chat - AI chat assistance")
+    print("  POST /api/chat/stream - AI chat assistance (streamed)")
     print("  POST /api/chat/clear - Clear chat history")
     print("  GET  /api/chat/history - Get chat history")
     print("  POST /api/generate/script - Generate video script")
@@ -949,21 +1042,22 @@ if __name__ == '__main__':
     # Check if running in production mode
     is_production = os.environ.get('ENVIRONMENT', 'development') == 'production'
     
-    # Run with Flask threaded server (more compatible)
-    print("🚀 Starting Flask server with threading support")
-    print("🔄 Connection persistence enabled")
-    print("⚡ Enhanced error handling active")
     print(f"🌍 Environment: {'Production' if is_production else 'Development'}")
     print(f"📍 Server: http://0.0.0.0:{port}")
     
     try:
-        app.run(
-            debug=not is_production, 
-            host='0.0.0.0', 
-            port=port, 
-            use_reloader=False, 
-            threaded=True
-        )
+        if not (is_production and run_production_server(port)):
+            # Run with Flask threaded server (development fallback)
+            print("🚀 Starting Flask server with threading support")
+            print("🔄 Connection persistence enabled")
+            print("⚡ Enhanced error handling active")
+            app.run(
+                debug=not is_production, 
+                host='0.0.0.0', 
+                port=port, 
+                use_reloader=False, 
+                threaded=True
+            )
     except Exception as e:
         print(f"\n❌ Server error: {e}")
         import traceback
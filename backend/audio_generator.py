@@ -3,8 +3,12 @@ import os
 import asyncio
 import time
 import random
+import shutil
+import subprocess
+import tempfile
 from typing import Dict, Any, Optional, List, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -16,11 +20,25 @@ except ImportError:
     EDGE_TTS_AVAILABLE = False
     logger.warning(" edge-tts not available for audio generation")
 
+_KNOWN_FALLBACKS = (
+    "demo_narration.mp3",
+    "test_narration.mp3",
+    "narration.mp3",
+    "test_male_voice_0.mp3"
+)
+
+# Edge-TTS throttles aggressive clients; 10 workers overlaps round trips without oversubscribing
+MAX_TTS_WORKERS = min(10, (os.cpu_count() or 4) * 2)
+
+# Below this many segments a plain byte copy beats forking ffmpeg
+FFMPEG_CONCAT_MIN_SEGMENTS = 5
+
 class AudioGenerator:
     
     def __init__(self, output_dir: str = None):
         self.output_dir = output_dir or os.path.join("assets", "audio")
         os.makedirs(self.output_dir, exist_ok=True)
+        self._audio_tmpl = os.path.join(self.output_dir, "{name}.mp3")
         
         self.tts_available = EDGE_TTS_AVAILABLE
         
@@ -37,6 +55,8 @@ class AudioGenerator:
         self.default_rate = "+0%"
         self.default_volume = "+0%"
         
+        self._executor = ThreadPoolExecutor(max_workers=MAX_TTS_WORKERS)
+        
         logger.info(f" Audio Generator initialized (TTS Available: {self.tts_available})")
     
     async def _generate_with_edge_tts(
@@ -61,7 +81,7 @@ class AudioGenerator:
             
             await communicate.save(output_path)
             
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            if self._file_size(output_path) > 0:
                 logger.info(f" Generated audio file: {output_path}")
                 return True
             else:
@@ -88,7 +108,7 @@ class AudioGenerator:
         
         filename = os.path.splitext(filename)[0]
         
-        output_path = os.path.join(self.output_dir, f"{filename}.mp3")
+        output_path = self._audio_tmpl.format(name=filename)
         
         if self.tts_available:
             success = asyncio.run(self._generate_with_edge_tts(
@@ -109,6 +129,74 @@ class AudioGenerator:
         
         return self._use_fallback_audio(script, output_path)
     
+    def generate_audio_batch(
+        self,
+        scripts: List[str],
+        voice: str = None,
+        rate: str = None,
+        volume: str = None
+    ) -> List[Dict[str, Any]]:
+        logger.info(f" Generating audio batch of {len(scripts)} scripts")
+        
+        timestamp = int(time.time())
+        futures = [
+            self._executor.submit(
+                self.generate_audio,
+                script,
+                voice=voice,
+                rate=rate,
+                volume=volume,
+                filename=f"narration_{timestamp}_{i}"
+            )
+            for i, script in enumerate(scripts)
+        ]
+        return [f.result() for f in futures]
+    
+    def concatenate_audio(self, segment_paths: List[str], output_path: str) -> bool:
+        if not segment_paths:
+            return False
+        
+        if len(segment_paths) >= FFMPEG_CONCAT_MIN_SEGMENTS:
+            concat_file = None
+            try:
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                    concat_file = f.name
+                    for path in segment_paths:
+                        escaped_path = os.path.abspath(path).replace('\\', '/').replace("'", "'\\''")
+                        f.write(f"file '{escaped_path}'\n")
+                
+                subprocess.run(
+                    ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file, '-c', 'copy', output_path],
+                    check=True,
+                    capture_output=True
+                )
+                return True
+            except (FileNotFoundError, subprocess.CalledProcessError) as e:
+                logger.warning(f" FFmpeg concat failed, falling back to byte concat: {e}")
+            finally:
+                if concat_file:
+                    try:
+                        os.remove(concat_file)
+                    except OSError:
+                        pass
+        
+        try:
+            with open(output_path, 'wb') as out:
+                for path in segment_paths:
+                    with open(path, 'rb') as seg:
+                        shutil.copyfileobj(seg, out)
+            return True
+        except OSError as e:
+            logger.error(f" Audio concatenation failed: {e}")
+            return False
+    
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+    
     def _estimate_audio_duration(self, text: str) -> float:
         words = len(text.split())
         return (words / 150) * 60
@@ -117,11 +205,10 @@ class AudioGenerator:
         logger.warning(" Using fallback audio file")
         
         fallback_files = []
-        for f in os.listdir(self.output_dir):
-            if f.endswith(".mp3"):
-                full_path = os.path.join(self.output_dir, f)
-                if os.path.getsize(full_path) > 1000:
-                    fallback_files.append(full_path)
+        with os.scandir(self.output_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".mp3") and entry.stat().st_size > 1000:
+                    fallback_files.append(entry.path)
         
         narration_files = [f for f in fallback_files if "narration" in f]
         if narration_files:
@@ -134,7 +221,7 @@ class AudioGenerator:
             logger.warning("No suitable audio files found, creating placeholder")
             fallback_path = self._create_placeholder_audio(script, output_path)
         
-        if fallback_path and os.path.exists(fallback_path):
+        if fallback_path and self._file_size(fallback_path) > 0:
             return {
                 "audio_path": fallback_path,
                 "duration": self._estimate_audio_duration(script),
@@ -151,18 +238,13 @@ class AudioGenerator:
     
     def _create_placeholder_audio(self, script: str, output_path: str) -> str:
         try:
-            working_files = [
-                "demo_narration.mp3",
-                "test_narration.mp3", 
-                "narration.mp3",
-                "test_male_voice_0.mp3"
-            ]
+            with os.scandir(self.output_dir) as it:
+                sizes = {e.name: e.stat().st_size for e in it if e.is_file()}
             
-            for filename in working_files:
-                source_path = os.path.join(self.output_dir, filename)
-                if os.path.exists(source_path) and os.path.getsize(source_path) > 1000:
+            for filename in _KNOWN_FALLBACKS:
+                if sizes.get(filename, 0) > 1000:
                     logger.info(f"Using template audio: {filename}")
-                    return source_path
+                    return os.path.join(self.output_dir, filename)
             
             return None
             
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Shared constants and rule-based intent routing for the chatbot engines
+"""
+import functools
+import re
+
+# System prompt used by the legacy platform-guide engines
+PLATFORM_SYSTEM_CONTEXT = """You are an expert AI assistant for a video generation platform. Your role is to help users create professional videos by:
+
+1. **Script Writing**: Guide users in creating engaging video scripts with proper structure
+2. **Visual Selection**: Advise on finding and selecting the right images/videos
+3. **Video Editing**: Provide tips on trimming, effects, transitions, and composition
+4. **Creative Ideas**: Suggest unique video concepts and trending topics
+5. **Platform Optimization**: Share best practices for different social media platforms
+
+Key capabilities of the platform:
+- Generate video scripts from text prompts
+- Search and fetch images/videos from Pexels API
+- Create AI voiceovers from scripts
+- Edit videos with timeline, trim, speed, volume controls
+- Apply visual effects (brightness, contrast, rotation, flip)
+- Export final videos in MP4 format
+
+Communication style:
+- Be friendly, encouraging, and professional
+- Provide actionable, step-by-step guidance
+- Use emojis appropriately for visual appeal
+- Keep responses concise but informative (3-5 paragraphs max)
+- Ask clarifying questions when needed
+- Reference specific platform features (Generate Video tab, Editor Lab, etc.)
+
+Always aim to provide practical, helpful responses that guide users to successfully create their videos."""
+
+VIDEO_TIPS = (
+    "For engaging videos, keep your intro under 5 seconds to hook viewers immediately.",
+    "Use dynamic transitions between scenes to maintain viewer interest.",
+    "Background music can increase engagement by up to 80% - choose tracks that match your video's mood.",
+    "The rule of thirds helps create visually appealing compositions in your scenes.",
+    "Short videos (30-60 seconds) tend to perform better on social media platforms.",
+)
+
+CREATIVE_PROMPTS = (
+    "Try creating a video about: 'A journey through different seasons'",
+    "How about: 'Urban life vs. Nature - A visual comparison'",
+    "Consider: 'The beauty of golden hour photography'",
+    "Idea: 'A day in the life of a busy city'",
+    "Suggestion: 'Peaceful ocean waves at sunset'",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Intent vocabularies for the rule-based fallback; keywords match whole words,
+# multi-word phrases match consecutive words
+_GREETING_WORDS = frozenset({'hello', 'hi', 'hey', 'greetings'})
+_HELP_PHRASES = frozenset({'what can you', 'help me', 'how to', 'can you help'})
+_SCRIPT_WORDS = frozenset({'script', 'scripts', 'write', 'writing', 'story', 'stories', 'narration', 'text'})
+_VISUAL_WORDS = frozenset({'image', 'images', 'photo', 'photos', 'picture', 'pictures', 'visual', 'visuals', 'footage', 'video clip'})
+_EDITING_WORDS = frozenset({'edit', 'edits', 'editing', 'trim', 'trimming', 'cut', 'cuts', 'cutting', 'editor', 'timeline'})
+_IDEA_WORDS = frozenset({'idea', 'ideas', 'creative', 'inspiration', 'suggest', 'suggestion', 'suggestions', 'topic', 'topics'})
+_TIP_WORDS = frozenset({'tip', 'tips', 'advice', 'best practice', 'best practices', 'recommend', 'recommendation', 'recommendations'})
+_DURATION_WORDS = frozenset({'long', 'duration', 'length', 'time', 'seconds', 'minutes'})
+_AUDIO_WORDS = frozenset({'music', 'audio', 'sound', 'sounds', 'voice', 'voiceover', 'narration'})
+_EXPORT_WORDS = frozenset({'export', 'exporting', 'download', 'downloading', 'save', 'saving', 'render', 'rendering'})
+_THANKS_WORDS = frozenset({'thank', 'thanks', 'thankyou', 'appreciate', 'appreciated'})
+_GOODBYE_WORDS = frozenset({'bye', 'goodbye', 'see you', 'later'})
+
+# Intents in priority order; when a message hits several, the earliest wins
+INTENT_KEYWORDS = (
+    ('greeting', _GREETING_WORDS),
+    ('help', _HELP_PHRASES),
+    ('script', _SCRIPT_WORDS),
+    ('visuals', _VISUAL_WORDS),
+    ('editing', _EDITING_WORDS),
+    ('ideas', _IDEA_WORDS),
+    ('tips', _TIP_WORDS),
+    ('duration', _DURATION_WORDS),
+    ('audio', _AUDIO_WORDS),
+    ('export', _EXPORT_WORDS),
+    ('thanks', _THANKS_WORDS),
+    ('goodbye', _GOODBYE_WORDS),
+)
+
+# Word-level trie of every keyword/phrase; a node's None key holds the (priority, intent)
+# of the phrase ending there, so one walk per word position finds all phrase hits
+_KEYWORD_TRIE = {}
+for _priority, (_intent, _keywords) in enumerate(INTENT_KEYWORDS):
+    for _keyword in _keywords:
+        _node = _KEYWORD_TRIE
+        for _word in _keyword.split():
+            _node = _node.setdefault(_word, {})
+        _node.setdefault(None, (_priority, _intent))
+
+INTENT_RESPONSES = {
+    'greeting': "Hello! I'm your AI video creation assistant. I can help you with:\n\n• Generating video scripts\n• Finding the perfect visuals\n• Creating engaging content\n• Video editing tips\n• Creative ideas\n\nWhat would you like to create today?",
+    'help': "I'm here to help you create amazing videos! Here's what I can assist with:\n\n🎬 **Script Generation**: I can help write engaging video scripts\n🎨 **Visual Selection**: Find perfect images and videos from Pexels\n✂️ **Editing Tips**: Get advice on video editing and composition\n💡 **Creative Ideas**: Generate unique video concepts\n🎵 **Audio Guidance**: Tips for voiceovers and background music\n\nJust tell me what you're working on, and I'll guide you through it!",
+    'script': "I can help you with video scripts! Here are some tips:\n\n📝 **Keep it Concise**: Aim for 130-150 words per minute of video\n🎯 **Hook Early**: Grab attention in the first 3 seconds\n💬 **Conversational Tone**: Write like you're talking to a friend\n📊 **Structure**: Use intro, main content, and call-to-action\n\nHead to the 'Generate Video' tab and enter your topic - I'll create a professional script for you! What's your video about?",
+    'visuals': "Looking for the perfect visuals? I've got you covered!\n\n🖼️ **High-Quality Sources**: I search Pexels for professional-grade content\n🎨 **Smart Matching**: I find visuals that match your script perfectly\n⚡ **Quick Selection**: Browse and pick exactly what you need\n\nGo to 'Generate Video' → Enter your prompt → Get curated visuals instantly!\n\nTip: Be specific with your descriptions (e.g., 'golden sunset over calm ocean' works better than just 'sunset')",
+    'editing': "The Editor Lab is perfect for video editing! Here's what you can do:\n\n✂️ **Trim Clips**: Adjust start/end points precisely\n⚡ **Speed Control**: Slow-mo or time-lapse effects\n🎚️ **Audio Mixing**: Adjust volume, add fade effects\n🎨 **Color Grading**: Brightness, contrast, and saturation\n🔄 **Rearrange**: Drag and drop clips on the timeline\n\nNavigate to 'Editor Lab' to start editing your videos!",
+    'ideas': "Need creative inspiration? Here are some trending video ideas:\n\n{tip}\n\n🌟 Popular Themes:\n• Nature & Landscapes\n• Urban Exploration\n• Time-lapse Videos\n• Before & After Transformations\n• Day-in-the-Life Content\n\nWhat type of content interests you most?",
+    'tips': "Here's a professional tip for you:\n\n💡 {tip}\n\nWant more specific advice? Ask me about:\n• Script writing\n• Visual composition\n• Audio selection\n• Video length\n• Engagement optimization",
+    'duration': "Video length matters! Here's the sweet spot for different platforms:\n\n📱 **Instagram Reels**: 15-30 seconds (max 90s)\n📺 **YouTube Shorts**: 15-60 seconds\n🎵 **TikTok**: 15-60 seconds (up to 10 mins)\n📘 **Facebook**: 1-2 minutes\n🐦 **Twitter**: 30-45 seconds\n🎥 **YouTube Standard**: 7-15 minutes\n\nShorter videos (30-60s) generally have higher completion rates. What platform are you creating for?",
+    'audio': "Audio can make or break your video! Here's what to consider:\n\n🎵 **Background Music**: Choose royalty-free tracks that match your mood\n🎤 **Voiceover**: Use clear, enthusiastic narration (130-150 WPM)\n🔊 **Volume Balance**: Music at 20-30% volume when voice is present\n⚡ **Audio Sync**: Match music beats with visual transitions\n\nIn 'Generate Video', I'll create voice narration from your script automatically. You can also add background music in the Editor Lab!",
+    'export': "Ready to export your video? Here's the process:\n\n1️⃣ Complete your video in 'Editor Lab'\n2️⃣ Click the 'Export Video' button\n3️⃣ Wait for processing (usually 30-60 seconds)\n4️⃣ Download your MP4 file\n\n✨ Export settings:\n• Format: MP4 (H.264)\n• Resolution: Original quality\n• Audio: AAC, 192kbps\n\nYour video will be ready to upload anywhere!",
+    'thanks': "You're welcome! I'm always here to help you create amazing videos. 😊\n\nFeel free to ask me anything about:\n• Video creation\n• Script writing\n• Visual selection\n• Editing techniques\n\nHappy creating!",
+    'goodbye': "Goodbye! Come back anytime you need help with video creation. Happy filming! 🎬✨",
+}
+
+DEFAULT_RESPONSE = "I'm your AI video creation assistant! I can help you with:\n\n✨ **Script Writing**: Create engaging video scripts\n🎨 **Visual Selection**: Find perfect images and videos\n✂️ **Video Editing**: Tips and techniques for polished videos\n💡 **Creative Ideas**: Brainstorm unique video concepts\n\nWhat would you like to know more about?"
+
+
+def normalize_message(message):
+    """Lower-case a message and collapse whitespace so equivalent inputs share a cache key"""
+    return _WHITESPACE_RE.sub(' ', message.lower()).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def match_intent(message_lower):
+    """Return the highest-priority intent mentioned in the message, or None"""
+    # Cached on the normalized message; reply variety is picked by the caller
+    words = _TOKEN_RE.findall(message_lower)
+    best = None
+    for i in range(len(words)):
+        node = _KEYWORD_TRIE
+        for word in words[i:]:
+            node = node.get(word)
+            if node is None:
+                break
+            hit = node.get(None)
+            if hit is not None and (best is None or hit < best):
+                best = hit
+    return best[1] if best else None
+
+
+# Exact short messages answered without routing or a model call
+FAST_PATH_RESPONSES = {
+    **dict.fromkeys(('hi', 'hello', 'hey', 'hi!', 'hello!', 'hey!'), INTENT_RESPONSES['greeting']),
+    **dict.fromkeys(('thanks', 'thank you', 'thanks!', 'thank you!', 'thx'), INTENT_RESPONSES['thanks']),
+    **dict.fromkeys(('bye', 'goodbye', 'bye!', 'goodbye!'), INTENT_RESPONSES['goodbye']),
+}
@@ -3,28 +3,54 @@
 AI Chatbot Engine for Video Generation Assistant
 Provides intelligent responses using NLP and Gen AI
 """
-import random
+import asyncio
 import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import cycle, islice
 from datetime import datetime
 import google.generativeai as genai
 
-class ChatbotEngine:
-    def __init__(self):
-        self.conversations = {}
-        
-        # Initialize Gemini AI
-        try:
-            from config import GEMINI_API_KEY
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-            self.use_ai = True
-            print("[Chatbot] ✅ Gemini AI initialized successfully (using gemini-2.0-flash)")
-        except Exception as e:
-            print(f"[Chatbot] ⚠️ AI initialization failed: {e}, using fallback responses")
-            self.use_ai = False
-        
-        # System prompt for AI context
-        self.system_context = """You are an intelligent and helpful AI assistant specialized in video creation and general knowledge.
+from chatbot_common import (
+    CREATIVE_PROMPTS,
+    DEFAULT_RESPONSE,
+    FAST_PATH_RESPONSES,
+    INTENT_RESPONSES,
+    VIDEO_TIPS,
+    match_intent,
+    normalize_message,
+)
+
+try:
+    import hnswlib
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+CHAT_DB_PATH = os.environ.get(
+    'CHAT_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_history.db')
+)
+MAX_CACHED_SESSIONS = int(os.environ.get('CHAT_MAX_CACHED_SESSIONS', 256))
+HISTORY_WINDOW = 40
+# Concurrent Gemini requests per batch; keep under the API key's per-minute quota
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', 8))
+
+GEMINI_TRANSPORT = os.environ.get('GEMINI_TRANSPORT', 'grpc')
+
+GENERATION_CONFIG = {
+    'temperature': 0.7,  # Balanced creativity and accuracy
+    'top_p': 0.9,
+    'top_k': 40,
+    'max_output_tokens': 1024,
+}
+
+# System prompt for AI context
+SYSTEM_CONTEXT = """You are an intelligent and helpful AI assistant specialized in video creation and general knowledge.
 
 Core Principles:
 - BE PROACTIVE: When users ask for prompts, scripts, or ideas - provide them immediately with useful content
@@ -54,173 +80,438 @@ Response Style:
 - Provide creative, detailed suggestions when asked for ideas
 - Match their tone and enthusiasm
 - Use formatting (bullet points, emojis) for clarity
-- Offer to expand or adjust based on their needs"""
-        
-        self.video_tips = [
-            "For engaging videos, keep your intro under 5 seconds to hook viewers immediately.",
-            "Use dynamic transitions between scenes to maintain viewer interest.",
-            "Background music can increase engagement by up to 80% - choose tracks that match your video's mood.",
-            "The rule of thirds helps create visually appealing compositions in your scenes.",
-            "Short videos (30-60 seconds) tend to perform better on social media platforms.",
-        ]
+- Offer to expand or adjust based on their needs
+
+Instructions:
+1. Understand what the user is asking for
+2. If they're asking for prompts, ideas, or creative content - PROVIDE IT IMMEDIATELY
+3. Don't ask unnecessary clarifying questions - be helpful and proactive
+4. For topic keywords (sunset, ocean, city, etc.) - give them video/script ideas right away
+5. Provide creative, detailed suggestions that they can use immediately
+6. Only ask questions if the request is truly impossible to answer without more info
+7. Consider conversation context but prioritize being directly helpful"""
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """Configure Gemini and build the GenerativeModel once per process"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from config import GEMINI_API_KEY
+                # gRPC keeps one multiplexed HTTP/2 channel open for the life of the process
+                genai.configure(api_key=GEMINI_API_KEY, transport=GEMINI_TRANSPORT)
+                _model = genai.GenerativeModel(
+                    'gemini-2.0-flash',
+                    system_instruction=SYSTEM_CONTEXT
+                )
+                print("[Chatbot] ✅ Gemini AI initialized successfully (using gemini-2.0-flash)")
+    return _model
+
+
+SEMANTIC_CACHE_DIR = os.environ.get(
+    'SEMANTIC_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'semantic_cache')
+)
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
+
+class SemanticResponseCache:
+    """Nearest-neighbour cache of Gemini replies keyed by message embeddings"""
+    
+    EMBEDDING_DIM = 384
+    SAVE_EVERY = 25
+    
+    def __init__(self, cache_dir=SEMANTIC_CACHE_DIR, threshold=SEMANTIC_CACHE_THRESHOLD, max_elements=10000):
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self.index_path = os.path.join(cache_dir, 'index.bin')
+        self.responses_path = os.path.join(cache_dir, 'responses.json')
+        os.makedirs(cache_dir, exist_ok=True)
         
-        self.creative_prompts = [
-            "Try creating a video about: 'A journey through different seasons'",
-            "How about: 'Urban life vs. Nature - A visual comparison'",
-            "Consider: 'The beauty of golden hour photography'",
-            "Idea: 'A day in the life of a busy city'",
-            "Suggestion: 'Peaceful ocean waves at sunset'",
-        ]
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.embed_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.index = hnswlib.Index(space='cosine', dim=self.EMBEDDING_DIM)
+        
+        if os.path.exists(self.index_path) and os.path.exists(self.responses_path):
+            self.index.load_index(self.index_path, max_elements=max_elements)
+            with open(self.responses_path, 'r', encoding='utf-8') as f:
+                self.responses = json.load(f)
+        else:
+            self.index.init_index(max_elements=max_elements, ef_construction=200, M=16)
+            self.responses = []
+    
+    def encode(self, message):
+        return self.embed_model.encode(message, normalize_embeddings=True)
+    
+    def lookup(self, embedding):
+        """Return the cached reply for the closest previous message, if similar enough"""
+        with self._lock:
+            if not self.responses:
+                return None
+            labels, distances = self.index.knn_query(embedding, k=1)
+        
+        if 1.0 - distances[0][0] >= self.threshold:
+            return self.responses[labels[0][0]]
+        return None
+    
+    def add(self, embedding, response):
+        with self._lock:
+            if len(self.responses) >= self.max_elements:
+                return
+            self.index.add_items(embedding, [len(self.responses)])
+            self.responses.append(response)
+            self._unsaved += 1
+            if self._unsaved >= self.SAVE_EVERY:
+                self._save()
+    
+    def _save(self):
+        self.index.save_index(self.index_path)
+        with open(self.responses_path, 'w', encoding='utf-8') as f:
+            json.dump(self.responses, f)
+        self._unsaved = 0
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Lazily build the shared semantic cache; returns None when its dependencies are missing"""
+    global _semantic_cache
+    if not SEMANTIC_CACHE_AVAILABLE:
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                try:
+                    _semantic_cache = SemanticResponseCache()
+                except Exception as e:
+                    print(f"[Chatbot] ⚠️ Semantic cache unavailable: {e}")
+                    return None
+    return _semantic_cache
+
+
+def _format_timestamp(ts):
+    """Render a stored epoch-nanosecond timestamp as ISO 8601 at the API boundary"""
+    # Rows written before timestamps were stored as integers are already ISO strings
+    if isinstance(ts, int):
+        return datetime.fromtimestamp(ts / 1e9).isoformat()
+    return ts
+
+
+class ChatbotEngine:
+    def __init__(self, db_path=CHAT_DB_PATH):
+        # Hot sessions are cached in memory; SQLite is the source of truth.
+        # _db_lock guards both the connection and the session cache
+        self.conversations = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'session_id TEXT NOT NULL, '
+            'timestamp INTEGER NOT NULL, '
+            'role TEXT NOT NULL, '
+            'message TEXT NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id)')
+        self._db.commit()
+        
+        # System prompt for AI context
+        self.system_context = SYSTEM_CONTEXT
+        
+        # Initialize Gemini AI (shared across engine instances)
+        try:
+            self.model = _get_model()
+            self.use_ai = True
+            self.semantic_cache = get_semantic_cache()
+        except Exception as e:
+            print(f"[Chatbot] ⚠️ AI initialization failed: {e}, using fallback responses")
+            self.use_ai = False
+            self.semantic_cache = None
+        
+        self.video_tips = VIDEO_TIPS
+        self.creative_prompts = CREATIVE_PROMPTS
+        # Rotate through tips/prompts instead of drawing from the PRNG per reply
+        self._tip_cycle = cycle(self.video_tips)
+        self._prompt_cycle = cycle(self.creative_prompts)
     
     def get_response(self, message, session_id='default', mode='smart'):
         """Generate AI-powered response to user message"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = {
-                'history': [],
-                'started': datetime.now().isoformat()
-            }
+        fast_reply = FAST_PATH_RESPONSES.get(message.strip().lower())
+        if fast_reply is not None:
+            return self._record_fast_reply(message, session_id, fast_reply)
+        
+        self._get_conversation(session_id)
         
         # Store user message
-        self.conversations[session_id]['history'].append({
-            'role': 'user',
-            'message': message,
-            'timestamp': datetime.now().isoformat()
-        })
+        self._append_message(session_id, 'user', message)
+        
+        # Normalize once; the fallback router and error paths share it
+        message_lower = normalize_message(message)
         
         # Generate response
         if self.use_ai:
-            response = self._generate_ai_response(message, session_id)
+            response = self._generate_ai_response(message, message_lower, session_id)
         else:
-            response = self._generate_fallback_response(message.lower().strip())
+            response = self._generate_fallback_response(message_lower)
         
         # Store assistant response
-        self.conversations[session_id]['history'].append({
-            'role': 'assistant',
-            'message': response,
-            'timestamp': datetime.now().isoformat()
-        })
+        self._append_message(session_id, 'assistant', response)
         
         return response
     
-    def _generate_ai_response(self, message, session_id):
-        """Generate response using Gemini AI with conversation context"""
-        try:
-            # Build conversation context
-            history = self.conversations[session_id]['history']
-            context_messages = []
-            
-            # Include last 10 exchanges for context (20 messages = 10 back-and-forth)
-            recent_history = history[-20:] if len(history) > 20 else history
-            
-            for msg in recent_history:
-                role = "User" if msg['role'] == 'user' else "Assistant"
-                context_messages.append(f"{role}: {msg['message']}")
-            
-            # Build full prompt with system context and conversation history
-            full_prompt = f"""{self.system_context}
-
-Previous conversation:
-{chr(10).join(context_messages) if context_messages else 'This is the start of the conversation.'}
-
-Current user message: {message}
-
-Instructions:
-1. Understand what the user is asking for
-2. If they're asking for prompts, ideas, or creative content - PROVIDE IT IMMEDIATELY
-3. Don't ask unnecessary clarifying questions - be helpful and proactive
-4. For topic keywords (sunset, ocean, city, etc.) - give them video/script ideas right away
-5. Provide creative, detailed suggestions that they can use immediately
-6. Only ask questions if the request is truly impossible to answer without more info
-7. Consider conversation context but prioritize being directly helpful
-
-Your response:"""
-            
-            # Generate AI response with improved settings
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config={
-                    'temperature': 0.7,  # Balanced creativity and accuracy
-                    'top_p': 0.9,
-                    'top_k': 40,
-                    'max_output_tokens': 1024,
-                }
-            )
-            return response.text.strip()
-            
-        except Exception as e:
-            print(f"[Chatbot] Error generating AI response: {e}")
-            # Fallback to rule-based response
-            return self._generate_fallback_response(message.lower().strip())
+    async def get_response_async(self, message, session_id='default', mode='smart'):
+        """Async variant of get_response that awaits Gemini without blocking the event loop"""
+        fast_reply = FAST_PATH_RESPONSES.get(message.strip().lower())
+        if fast_reply is not None:
+            return self._record_fast_reply(message, session_id, fast_reply)
+        
+        self._get_conversation(session_id)
+        
+        # Store user message
+        self._append_message(session_id, 'user', message)
+        
+        # Normalize once; the fallback router and error paths share it
+        message_lower = normalize_message(message)
+        
+        # Generate response
+        if self.use_ai:
+            response = await self._generate_ai_response_async(message, message_lower, session_id)
+        else:
+            response = self._generate_fallback_response(message_lower)
+        
+        # Store assistant response
+        self._append_message(session_id, 'assistant', response)
+        
+        return response
     
-    def _generate_fallback_response(self, message_lower):
-        """Generate fallback response when AI is unavailable (rule-based)"""
+    def stream_response(self, message, session_id='default', mode='smart'):
+        """Yield the reply in chunks as Gemini produces them; history is stored once complete"""
+        fast_reply = FAST_PATH_RESPONSES.get(message.strip().lower())
+        if fast_reply is not None:
+            yield self._record_fast_reply(message, session_id, fast_reply)
+            return
         
-        # Greetings
-        if any(word in message_lower for word in ['hello', 'hi', 'hey', 'greetings']):
-            return "Hello! I'm your AI video creation assistant. I can help you with:\n\n• Generating video scripts\n• Finding the perfect visuals\n• Creating engaging content\n• Video editing tips\n• Creative ideas\n\nWhat would you like to create today?"
+        self._get_conversation(session_id)
         
-        # Help/What can you do
-        if any(phrase in message_lower for phrase in ['what can you', 'help me', 'how to', 'can you help']):
-            return "I'm here to help you create amazing videos! Here's what I can assist with:\n\n🎬 **Script Generation**: I can help write engaging video scripts\n🎨 **Visual Selection**: Find perfect images and videos from Pexels\n✂️ **Editing Tips**: Get advice on video editing and composition\n💡 **Creative Ideas**: Generate unique video concepts\n🎵 **Audio Guidance**: Tips for voiceovers and background music\n\nJust tell me what you're working on, and I'll guide you through it!"
+        # Store user message
+        self._append_message(session_id, 'user', message)
         
-        # Script-related questions
-        if any(word in message_lower for word in ['script', 'write', 'story', 'narration', 'text']):
-            return "I can help you with video scripts! Here are some tips:\n\n📝 **Keep it Concise**: Aim for 130-150 words per minute of video\n🎯 **Hook Early**: Grab attention in the first 3 seconds\n💬 **Conversational Tone**: Write like you're talking to a friend\n📊 **Structure**: Use intro, main content, and call-to-action\n\nHead to the 'Generate Video' tab and enter your topic - I'll create a professional script for you! What's your video about?"
+        message_lower = normalize_message(message)
+        chunks = []
         
-        # Visual/Image questions
-        if any(word in message_lower for word in ['image', 'photo', 'picture', 'visual', 'footage', 'video clip']):
-            return "Looking for the perfect visuals? I've got you covered!\n\n🖼️ **High-Quality Sources**: I search Pexels for professional-grade content\n🎨 **Smart Matching**: I find visuals that match your script perfectly\n⚡ **Quick Selection**: Browse and pick exactly what you need\n\nGo to 'Generate Video' → Enter your prompt → Get curated visuals instantly!\n\nTip: Be specific with your descriptions (e.g., 'golden sunset over calm ocean' works better than just 'sunset')"
+        if self.use_ai:
+            try:
+                chat = self._get_chat(session_id)
+                for chunk in chat.send_message(message, generation_config=GENERATION_CONFIG, stream=True):
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        yield chunk.text
+                self._trim_chat(chat)
+            except Exception as e:
+                print(f"[Chatbot] Error streaming AI response: {e}")
+                self._discard_chat(session_id)
         
-        # Editing questions
-        if any(word in message_lower for word in ['edit', 'editing', 'trim', 'cut', 'editor', 'timeline']):
-            return "The Editor Lab is perfect for video editing! Here's what you can do:\n\n✂️ **Trim Clips**: Adjust start/end points precisely\n⚡ **Speed Control**: Slow-mo or time-lapse effects\n🎚️ **Audio Mixing**: Adjust volume, add fade effects\n🎨 **Color Grading**: Brightness, contrast, and saturation\n🔄 **Rearrange**: Drag and drop clips on the timeline\n\nNavigate to 'Editor Lab' to start editing your videos!"
+        if not chunks:
+            fallback = self._generate_fallback_response(message_lower)
+            chunks.append(fallback)
+            yield fallback
         
-        # Creative ideas
-        if any(word in message_lower for word in ['idea', 'creative', 'inspiration', 'suggest', 'topic']):
-            tip = random.choice(self.creative_prompts)
-            return f"Need creative inspiration? Here are some trending video ideas:\n\n{tip}\n\n🌟 Popular Themes:\n• Nature & Landscapes\n• Urban Exploration\n• Time-lapse Videos\n• Before & After Transformations\n• Day-in-the-Life Content\n\nWhat type of content interests you most?"
+        # Store assistant response
+        self._append_message(session_id, 'assistant', ''.join(chunks).strip())
+    
+    def _record_fast_reply(self, message, session_id, reply):
+        """Store a canned greeting/goodbye exchange and return the reply"""
+        self._append_message(session_id, 'user', message)
+        self._append_message(session_id, 'assistant', reply)
+        # The exchange bypassed Gemini, so any open ChatSession is now behind
+        self._discard_chat(session_id)
+        return reply
+    
+    async def get_responses_async(self, requests, max_concurrency=GEMINI_MAX_CONCURRENCY):
+        """
+        Answer a batch of (message, session_id) pairs concurrently.
+        Different sessions overlap their Gemini calls; messages for the same
+        session are answered in order so each turn sees the previous one.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        by_session = OrderedDict()
+        for i, (message, session_id) in enumerate(requests):
+            by_session.setdefault(session_id, []).append((i, message))
         
-        # Tips/Advice
-        if any(word in message_lower for word in ['tip', 'advice', 'best practice', 'recommend']):
-            tip = random.choice(self.video_tips)
-            return f"Here's a professional tip for you:\n\n💡 {tip}\n\nWant more specific advice? Ask me about:\n• Script writing\n• Visual composition\n• Audio selection\n• Video length\n• Engagement optimization"
+        results = [None] * len(requests)
         
-        # Duration/Length questions
-        if any(word in message_lower for word in ['long', 'duration', 'length', 'time', 'seconds', 'minutes']):
-            return "Video length matters! Here's the sweet spot for different platforms:\n\n📱 **Instagram Reels**: 15-30 seconds (max 90s)\n📺 **YouTube Shorts**: 15-60 seconds\n🎵 **TikTok**: 15-60 seconds (up to 10 mins)\n📘 **Facebook**: 1-2 minutes\n🐦 **Twitter**: 30-45 seconds\n🎥 **YouTube Standard**: 7-15 minutes\n\nShorter videos (30-60s) generally have higher completion rates. What platform are you creating for?"
+        async def run_session(session_id, items):
+            for i, message in items:
+                async with semaphore:
+                    results[i] = await self.get_response_async(message, session_id)
         
-        # Music/Audio questions
-        if any(word in message_lower for word in ['music', 'audio', 'sound', 'voice', 'narration']):
-            return "Audio can make or break your video! Here's what to consider:\n\n🎵 **Background Music**: Choose royalty-free tracks that match your mood\n🎤 **Voiceover**: Use clear, enthusiastic narration (130-150 WPM)\n🔊 **Volume Balance**: Music at 20-30% volume when voice is present\n⚡ **Audio Sync**: Match music beats with visual transitions\n\nIn 'Generate Video', I'll create voice narration from your script automatically. You can also add background music in the Editor Lab!"
+        await asyncio.gather(*(run_session(sid, items) for sid, items in by_session.items()))
+        return results
+    
+    def get_responses(self, requests, max_concurrency=GEMINI_MAX_CONCURRENCY):
+        """Blocking wrapper around get_responses_async for sync callers"""
+        return asyncio.run(self.get_responses_async(requests, max_concurrency))
+    
+    def _get_conversation(self, session_id):
+        """Return the cached conversation, loading recent turns from SQLite on a miss"""
+        with self._db_lock:
+            conversation = self.conversations.get(session_id)
+            if conversation is not None:
+                self.conversations.move_to_end(session_id)
+                return conversation
+            
+            rows = self._db.execute(
+                'SELECT timestamp, role, message FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?',
+                (session_id, HISTORY_WINDOW)
+            ).fetchall()
+            rows.reverse()
+            
+            # Parallel per-field deques (role, message, timestamp) instead of a dict per turn
+            conversation = {
+                'roles': deque((role for _, role, _ in rows), maxlen=HISTORY_WINDOW),
+                'messages': deque((msg for _, _, msg in rows), maxlen=HISTORY_WINDOW),
+                'timestamps': deque((ts for ts, _, _ in rows), maxlen=HISTORY_WINDOW),
+                'started': rows[0][0] if rows else time.time_ns()
+            }
+            self.conversations[session_id] = conversation
+            if len(self.conversations) > MAX_CACHED_SESSIONS:
+                self.conversations.popitem(last=False)
+            return conversation
+    
+    def _append_message(self, session_id, role, message):
+        """Persist a message and add it to the cached session history"""
+        conversation = self._get_conversation(session_id)
+        timestamp = time.time_ns()
+        with self._db_lock:
+            self._db.execute(
+                'INSERT INTO messages (session_id, timestamp, role, message) VALUES (?, ?, ?, ?)',
+                (session_id, timestamp, role, message)
+            )
+            self._db.commit()
         
-        # Export/Download questions
-        if any(word in message_lower for word in ['export', 'download', 'save', 'render']):
-            return "Ready to export your video? Here's the process:\n\n1️⃣ Complete your video in 'Editor Lab'\n2️⃣ Click the 'Export Video' button\n3️⃣ Wait for processing (usually 30-60 seconds)\n4️⃣ Download your MP4 file\n\n✨ Export settings:\n• Format: MP4 (H.264)\n• Resolution: Original quality\n• Audio: AAC, 192kbps\n\nYour video will be ready to upload anywhere!"
+        conversation['roles'].append(role)
+        conversation['messages'].append(message)
+        conversation['timestamps'].append(timestamp)
+    
+    def _get_chat(self, session_id):
+        """Return the session's Gemini ChatSession, seeding a new one from recent turns if needed"""
+        conversation = self.conversations[session_id]
+        chat = conversation.get('chat')
+        if chat is not None:
+            return chat
         
-        # Thank you
-        if any(word in message_lower for word in ['thank', 'thanks', 'appreciate']):
-            return "You're welcome! I'm always here to help you create amazing videos. 😊\n\nFeel free to ask me anything about:\n• Video creation\n• Script writing\n• Visual selection\n• Editing techniques\n\nHappy creating!"
+        # Include last 10 exchanges for context (20 messages = 10 back-and-forth)
+        # The current message was already stored, so it is sent separately
+        count = len(conversation['roles'])
+        start = max(count - 21, 0)
+        recent_history = [
+            {'role': 'user' if role == 'user' else 'model', 'parts': [msg]}
+            for role, msg in zip(
+                islice(conversation['roles'], start, count - 1),
+                islice(conversation['messages'], start, count - 1)
+            )
+        ]
+        chat = self.model.start_chat(history=recent_history)
+        conversation['chat'] = chat
+        return chat
+    
+    @staticmethod
+    def _trim_chat(chat):
+        """Keep the live ChatSession to the same 20-message window used when seeding it"""
+        if len(chat.history) > 20:
+            chat.history = chat.history[-20:]
+    
+    def _discard_chat(self, session_id):
+        """Drop a ChatSession whose history no longer matches the stored turns"""
+        self.conversations[session_id].pop('chat', None)
+    
+    def _lookup_cached_response(self, message, session_id):
+        """Check the semantic cache for context-free turns; returns (reply, embedding)"""
+        # Replies that depend on earlier turns are never served from the cache
+        if self.semantic_cache is None or len(self.conversations[session_id]['roles']) > 1:
+            return None, None
+        try:
+            embedding = self.semantic_cache.encode(message)
+            return self.semantic_cache.lookup(embedding), embedding
+        except Exception as e:
+            print(f"[Chatbot] Semantic cache lookup failed: {e}")
+            return None, None
+    
+    def _generate_ai_response(self, message, message_lower, session_id):
+        """Generate response using Gemini AI with conversation context"""
+        try:
+            cached, embedding = self._lookup_cached_response(message, session_id)
+            if cached is not None:
+                return cached
+            
+            chat = self._get_chat(session_id)
+            response = chat.send_message(message, generation_config=GENERATION_CONFIG)
+            self._trim_chat(chat)
+            reply = response.text.strip()
+            if embedding is not None:
+                self.semantic_cache.add(embedding, reply)
+            return reply
+            
+        except Exception as e:
+            print(f"[Chatbot] Error generating AI response: {e}")
+            self._discard_chat(session_id)
+            # Fallback to rule-based response
+            return self._generate_fallback_response(message_lower)
+    
+    async def _generate_ai_response_async(self, message, message_lower, session_id):
+        """Generate response using Gemini AI without blocking the event loop"""
+        try:
+            cached, embedding = self._lookup_cached_response(message, session_id)
+            if cached is not None:
+                return cached
+            
+            chat = self._get_chat(session_id)
+            response = await chat.send_message_async(message, generation_config=GENERATION_CONFIG)
+            self._trim_chat(chat)
+            reply = response.text.strip()
+            if embedding is not None:
+                self.semantic_cache.add(embedding, reply)
+            return reply
+            
+        except Exception as e:
+            print(f"[Chatbot] Error generating AI response: {e}")
+            self._discard_chat(session_id)
+            # Fallback to rule-based response
+            return self._generate_fallback_response(message_lower)
+    
+    def _generate_fallback_response(self, message_lower):
+        """Generate fallback response when AI is unavailable (rule-based)"""
+        intent = match_intent(message_lower)
         
-        # Goodbye
-        if any(word in message_lower for word in ['bye', 'goodbye', 'see you', 'later']):
-            return "Goodbye! Come back anytime you need help with video creation. Happy filming! 🎬✨"
+        if intent == 'ideas':
+            return INTENT_RESPONSES['ideas'].format(tip=next(self._prompt_cycle))
+        if intent == 'tips':
+            return INTENT_RESPONSES['tips'].format(tip=next(self._tip_cycle))
         
-        # General/Default response
-        return "I'm your AI video creation assistant! I can help you with:\n\n✨ **Script Writing**: Create engaging video scripts\n🎨 **Visual Selection**: Find perfect images and videos\n✂️ **Video Editing**: Tips and techniques for polished videos\n💡 **Creative Ideas**: Brainstorm unique video concepts\n\nWhat would you like to know more about?"
+        return INTENT_RESPONSES.get(intent, DEFAULT_RESPONSE)
     
     def get_history(self, session_id='default'):
         """Get conversation history for a session"""
-        if session_id in self.conversations:
-            return self.conversations[session_id].get('history', [])
-        return []
+        with self._db_lock:
+            rows = self._db.execute(
+                'SELECT timestamp, role, message FROM messages WHERE session_id = ? ORDER BY id',
+                (session_id,)
+            ).fetchall()
+        return [{'role': role, 'message': msg, 'timestamp': _format_timestamp(ts)} for ts, role, msg in rows]
     
     def clear_history(self, session_id='default'):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            self.conversations[session_id] = {
-                'history': [],
-                'started': datetime.now().isoformat()
-            }
-            return True
-        return False
-
+        with self._db_lock:
+            deleted = self._db.execute('DELETE FROM messages WHERE session_id = ?', (session_id,)).rowcount
+            self._db.commit()
+        cached = self.conversations.pop(session_id, None)
+        return bool(deleted) or cached is not None
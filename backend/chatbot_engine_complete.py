@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 import google.generativeai as genai
 
+from chatbot_common import PLATFORM_SYSTEM_CONTEXT, VIDEO_TIPS, CREATIVE_PROMPTS
+
 class ChatbotEngine:
     def __init__(self):
         self.conversations = {}
@@ -24,47 +26,10 @@ class ChatbotEngine:
             self.use_ai = False
         
         # System prompt for AI context
-        self.system_context = """You are an expert AI assistant for a video generation platform. Your role is to help users create professional videos by:
-
-1. **Script Writing**: Guide users in creating engaging video scripts with proper structure
-2. **Visual Selection**: Advise on finding and selecting the right images/videos
-3. **Video Editing**: Provide tips on trimming, effects, transitions, and composition
-4. **Creative Ideas**: Suggest unique video concepts and trending topics
-5. **Platform Optimization**: Share best practices for different social media platforms
-
-Key capabilities of the platform:
-- Generate video scripts from text prompts
-- Search and fetch images/videos from Pexels API
-- Create AI voiceovers from scripts
-- Edit videos with timeline, trim, speed, volume controls
-- Apply visual effects (brightness, contrast, rotation, flip)
-- Export final videos in MP4 format
-
-Communication style:
-- Be friendly, encouraging, and professional
-- Provide actionable, step-by-step guidance
-- Use emojis appropriately for visual appeal
-- Keep responses concise but informative (3-5 paragraphs max)
-- Ask clarifying questions when needed
-- Reference specific platform features (Generate Video tab, Editor Lab, etc.)
-
-Always aim to provide practical, helpful responses that guide users to successfully create their videos."""
-        
-        self.video_tips = [
-            "For engaging videos, keep your intro under 5 seconds to hook viewers immediately.",
-            "Use dynamic transitions between scenes to maintain viewer interest.",
-            "Background music can increase engagement by up to 80% - choose tracks that match your video's mood.",
-            "The rule of thirds helps create visually appealing compositions in your scenes.",
-            "Short videos (30-60 seconds) tend to perform better on social media platforms.",
-        ]
+        self.system_context = PLATFORM_SYSTEM_CONTEXT
         
-        self.creative_prompts = [
-            "Try creating a video about: 'A journey through different seasons'",
-            "How about: 'Urban life vs. Nature - A visual comparison'",
-            "Consider: 'The beauty of golden hour photography'",
-            "Idea: 'A day in the life of a busy city'",
-            "Suggestion: 'Peaceful ocean waves at sunset'",
-        ]
+        self.video_tips = VIDEO_TIPS
+        self.creative_prompts = CREATIVE_PROMPTS
     
     def get_response(self, message, session_id='default', mode='smart'):
         """Generate AI-powered response to user message"""
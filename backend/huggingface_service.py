@@ -5,11 +5,170 @@ Provides Image-to-Video conversion using Stable Video Diffusion
 with fallback to local animation
 """
 
+import hashlib
+import math
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional
 from config import HUGGINGFACE_TOKEN, DEEPAI_API_KEY
 
+try:
+    import numpy as np
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Fallback animation length
+ANIMATION_FPS = 30
+ANIMATION_DURATION = 5  # seconds
+# Source images are downscaled to at most this many pixels (720p) before animating
+MAX_FRAME_PIXELS = 1280 * 720
+# OpenCV releases the GIL in warpAffine/LUT, so frames render in parallel
+FRAME_RENDER_WORKERS = os.cpu_count() or 4
+# Frames rendered ahead of the encoder; bounds memory to a few frames per worker
+FRAME_PREFETCH = FRAME_RENDER_WORKERS * 2
+# Output rows per warpAffine call, sized so a band stays cache resident
+WARP_BAND_BYTES = 256 * 1024
+# Decoded/resized sources and their animation parameters kept for repeat conversions
+SOURCE_CACHE_SIZE = 8
+# Rendered fallback videos kept on disk, keyed by source content and settings
+RENDER_CACHE_DIR = "assets/cache/animations"
+RENDER_CACHE_SIZE = 16
+
+_source_cache = OrderedDict()
+_source_cache_lock = threading.Lock()
+
+
+def _source_cache_key(image_path: str, *settings):
+    """Cache key that changes whenever the image file is replaced or edited"""
+    stat = os.stat(image_path)
+    return (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size) + settings
+
+
+def _source_cache_get(key):
+    with _source_cache_lock:
+        entry = _source_cache.get(key)
+        if entry is not None:
+            _source_cache.move_to_end(key)
+        return entry
+
+
+def _source_cache_put(key, entry) -> None:
+    with _source_cache_lock:
+        _source_cache[key] = entry
+        _source_cache.move_to_end(key)
+        while len(_source_cache) > SOURCE_CACHE_SIZE:
+            _source_cache.popitem(last=False)
+
+
+@dataclass(frozen=True)
+class VideoSpec:
+    """Deterministic description of a fallback animation: same spec, same video"""
+    image_path: str
+    source_digest: str
+    fps: int = ANIMATION_FPS
+    duration: int = ANIMATION_DURATION
+    
+    @property
+    def cache_path(self) -> str:
+        name = f"{self.source_digest[:32]}_{self.fps}_{self.duration}_{MAX_FRAME_PIXELS}.mp4"
+        return os.path.join(RENDER_CACHE_DIR, name)
+
+
+def _animation_params(width: int, height: int, fps: int, num_frames: int):
+    """Per-frame zoom, view center, rotation and brightness LUT arrays for the fallback animation"""
+    import numpy as np
+    
+    progress = np.arange(num_frames) / num_frames
+    
+    # Smooth easing function (ease-in-out)
+    eased_progress = 0.5 - 0.5 * np.cos(progress * np.pi)
+    
+    # Dynamic zoom (1.0 to 1.3 with ease)
+    zoom = 1.0 + (0.3 * eased_progress)
+    
+    # Pan effect (move from bottom-right to top-left slightly)
+    pan_x = ((width * 0.1) * (1 - eased_progress)).astype(np.int32)
+    pan_y = ((height * 0.1) * (1 - eased_progress)).astype(np.int32)
+    
+    # Center point with pan offset, clamped so the zoomed view stays inside the image
+    half_w = width / (2 * zoom)
+    half_h = height / (2 * zoom)
+    center_x = np.clip((width / 2) + pan_x, half_w, width - half_w)
+    center_y = np.clip((height / 2) + pan_y, half_h, height - half_h)
+    
+    # Slight rotation for first/last frames (smooth transition)
+    frame_idx = np.arange(num_frames)
+    edge_frames = (frame_idx < fps * 0.5) | (frame_idx > num_frames - (fps * 0.5))
+    rotation = np.where(edge_frames, 0.5 * np.sin(progress * np.pi * 2), 0.0)
+    
+    # Subtle brightness variation (pulsing effect), as one 256-entry uint8 lookup
+    # table per frame so applying it never promotes frame data out of uint8
+    brightness = 1.0 + (0.05 * np.sin(progress * np.pi * 2))
+    brightness_luts = np.clip(np.arange(256) * brightness[:, None] + 0.5, 0, 255).astype(np.uint8)
+    
+    return zoom, center_x, center_y, rotation, brightness_luts
+
+
+def _inverse_view_matrix(cx: float, cy: float, angle: float, zoom: float, width: int, height: int):
+    """Inverse (output pixel -> source pixel) of the frame transform cv2.getRotationMatrix2D builds"""
+    theta = math.radians(angle)
+    a = zoom * math.cos(theta)
+    b = zoom * math.sin(theta)
+    tx = (1 - a) * cx - b * cy + (width / 2) - cx
+    ty = b * cx + (1 - a) * cy + (height / 2) - cy
+    det = a * a + b * b
+    ia = a / det
+    ib = b / det
+    return ia, -ib, -(ia * tx - ib * ty), ib, ia, -(ib * tx + ia * ty)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _reflect_index(i, n):
+        """Map an out-of-range index back inside [0, n) like cv2.BORDER_REFLECT"""
+        if n == 1:
+            return 0
+        while i < 0 or i >= n:
+            if i < 0:
+                i = -i - 1
+            else:
+                i = 2 * n - i - 1
+        return i
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _warp_frame_numba(src, dst, m00, m01, m02, m10, m11, m12, lut):
+        """Bilinear affine warp of src into dst (inverse matrix given), then a uint8 LUT
+
+        Interpolation uses 11-bit fixed-point weights like OpenCV's INTER_LINEAR, so
+        pixel math stays in integers.
+        """
+        src_h, src_w = src.shape[0], src.shape[1]
+        for y in prange(dst.shape[0]):
+            for x in range(dst.shape[1]):
+                sx = m00 * x + m01 * y + m02
+                sy = m10 * x + m11 * y + m12
+                x0 = int(math.floor(sx))
+                y0 = int(math.floor(sy))
+                wx = int((sx - x0) * 2048.0)
+                wy = int((sy - y0) * 2048.0)
+                xa = _reflect_index(x0, src_w)
+                xb = _reflect_index(x0 + 1, src_w)
+                ya = _reflect_index(y0, src_h)
+                yb = _reflect_index(y0 + 1, src_h)
+                for c in range(3):
+                    top = int(src[ya, xa, c]) * (2048 - wx) + int(src[ya, xb, c]) * wx
+                    bottom = int(src[yb, xa, c]) * (2048 - wx) + int(src[yb, xb, c]) * wx
+                    dst[y, x, c] = lut[(top * (2048 - wy) + bottom * wy + (1 << 21)) >> 22]
+
 class HuggingFaceService:
     """AI service for Image-to-Video conversion using DeepAI"""
     
@@ -19,123 +178,305 @@ class HuggingFaceService:
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         self.base_url = "https://api-inference.huggingface.co/models"
         self.use_fallback = False
+        # Pooled keep-alive connections; auth headers stay per request because the
+        # session is shared between HuggingFace and DeepAI hosts
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=2))
         print(f"[AI Service] Initialized with DeepAI key: {self.deepai_key[:20]}...")
     
-    def _create_animated_video_fallback(self, image_path: str, output_path: str) -> str:
+    @staticmethod
+    def _open_ffmpeg_encoder(output_path: str, width: int, height: int, fps: int) -> Optional[subprocess.Popen]:
+        """Start an ffmpeg process that encodes raw BGR frames from stdin to H.264 (None if ffmpeg is missing)"""
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+            output_path
+        ]
+        try:
+            return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        except (FileNotFoundError, OSError):
+            return None
+    
+    @staticmethod
+    def _stream_response_to_file(response: requests.Response, output_path: str) -> int:
+        """Copy a stream=True response body to disk in 1 MB chunks; returns the file size"""
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        response.raw.decode_content = True
+        with open(output_path, 'wb') as f:
+            shutil.copyfileobj(response.raw, f, length=1024 * 1024)
+            f.flush()
+            os.fsync(f.fileno())
+        return os.path.getsize(output_path)
+    
+    @staticmethod
+    def _finish_encoder(encoder: subprocess.Popen) -> None:
+        """Close ffmpeg's stdin and raise if encoding failed"""
+        encoder.stdin.close()
+        stderr = encoder.stderr.read()
+        if encoder.wait() != 0:
+            raise Exception(f"ffmpeg encoding failed: {stderr.decode(errors='ignore').strip()}")
+    
+    @staticmethod
+    def _check_video_file(output_path: str) -> int:
+        """Verify the video file was created and has content; returns its size"""
+        if not os.path.exists(output_path):
+            raise Exception("Video file was not created")
+        
+        file_size = os.path.getsize(output_path)
+        if file_size == 0:
+            raise Exception("Video file is empty")
+        return file_size
+    
+    def _create_animated_video_fallback(self, image_path: str, output_path: str,
+                                        fps: int = ANIMATION_FPS, duration: int = ANIMATION_DURATION) -> str:
         """Create animated video using local libraries (fallback method)"""
         try:
-            from PIL import Image
             import numpy as np
             import cv2
             
-            print("[HuggingFace] Using fallback: Creating animated video with zoom/pan effects")
-            
-            # Load image
-            img = Image.open(image_path)
-            img = img.convert('RGB')
-            
-            # Resize to reasonable dimensions
-            max_size = 1024
-            if max(img.size) > max_size:
-                ratio = max_size / max(img.size)
-                new_size = tuple(int(dim * ratio) for dim in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+            # Frames are parallelized across FRAME_RENDER_WORKERS threads; keep OpenCV's own
+            # row-parallel pool out of the way so the two don't oversubscribe the cores
+            cv2.setNumThreads(1)
             
-            img_array = np.array(img)
-            height, width = img_array.shape[:2]
+            print("[HuggingFace] Using fallback: Creating animated video with zoom/pan effects")
             
-            # Video settings
-            fps = 30
-            duration = 5  # Increased to 5 seconds for smoother animation
             num_frames = fps * duration
             
-            # Create video writer with H.264 codec for better browser compatibility
-            # Try different codecs in order of preference
-            fourcc_options = [
-                cv2.VideoWriter_fourcc(*'avc1'),  # H.264 - best for web
-                cv2.VideoWriter_fourcc(*'H264'),  # Alternative H.264
-                cv2.VideoWriter_fourcc(*'X264'),  # x264 encoder
-                cv2.VideoWriter_fourcc(*'mp4v'),  # Fallback
-            ]
-            
-            out = None
-            for fourcc in fourcc_options:
-                out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-                if out.isOpened():
-                    print(f"[HuggingFace] Using codec: {fourcc}")
-                    break
-                out.release()
-            
-            if out is None or not out.isOpened():
-                raise Exception("Could not initialize video writer with any codec")
-            
-            print(f"[HuggingFace] Generating {num_frames} frames at {fps} FPS with advanced animations...")
-            
-            # Enhanced animation: Zoom + Pan + Slight Rotation
-            for i in range(num_frames):
-                progress = i / num_frames
-                
-                # Smooth easing function (ease-in-out)
-                eased_progress = 0.5 - 0.5 * np.cos(progress * np.pi)
+            # Decoding, resizing and parameter setup are reused across calls for the same file
+            cache_key = _source_cache_key(image_path, 'cv2', MAX_FRAME_PIXELS, fps, duration)
+            cached = _source_cache_get(cache_key)
+            if cached is not None:
+                img_bgr, zoom, center_x, center_y, rotation, brightness_luts = cached
+            else:
+                # Load image straight into OpenCV's BGR order so frames can be written as rendered
+                img_bgr = cv2.imread(image_path, cv2.IMREAD_COLOR)
+                if img_bgr is None:
+                    raise Exception(f"Could not read image file: {image_path}")
                 
-                # Dynamic zoom (1.0 to 1.3 with ease)
-                zoom = 1.0 + (0.3 * eased_progress)
+                # Bound the per-frame pixel count regardless of aspect ratio
+                height, width = img_bgr.shape[:2]
+                if height * width > MAX_FRAME_PIXELS:
+                    scale = math.sqrt(MAX_FRAME_PIXELS / (height * width))
+                    new_size = (int(width * scale), int(height * scale))
+                    img_bgr = cv2.resize(img_bgr, new_size, interpolation=cv2.INTER_AREA)
                 
-                # Pan effect (move from bottom-right to top-left slightly)
-                pan_x = int((width * 0.1) * (1 - eased_progress))
-                pan_y = int((height * 0.1) * (1 - eased_progress))
+                # yuv420p needs even dimensions; drop at most one trailing row/column
+                height, width = img_bgr.shape[:2]
+                height -= height % 2
+                width -= width % 2
+                img_bgr = np.ascontiguousarray(img_bgr[:height, :width])
                 
-                # Calculate crop region for zoom with pan
-                crop_w = int(width / zoom)
-                crop_h = int(height / zoom)
+                # Enhanced animation: Zoom + Pan + Slight Rotation
+                zoom, center_x, center_y, rotation, brightness_luts = _animation_params(width, height, fps, num_frames)
                 
-                # Center point with pan offset
-                center_x = (width // 2) + pan_x
-                center_y = (height // 2) + pan_y
-                
-                x = max(0, min(width - crop_w, center_x - crop_w // 2))
-                y = max(0, min(height - crop_h, center_y - crop_h // 2))
-                
-                # Crop the image
-                cropped = img_array[y:y+crop_h, x:x+crop_w]
+                _source_cache_put(cache_key, (img_bgr, zoom, center_x, center_y, rotation, brightness_luts))
+            
+            height, width = img_bgr.shape[:2]
+            
+            # Prefer piping raw frames into ffmpeg/libx264: real H.264 for browsers,
+            # which most OpenCV wheels cannot produce
+            out = None
+            encoder = self._open_ffmpeg_encoder(output_path, width, height, fps)
+            if encoder is not None:
+                print("[HuggingFace] Using codec: libx264 (ffmpeg pipe)")
+                # Frame buffers are C-contiguous, so the raw memoryview is written without a copy
+                write_frame = lambda frame: encoder.stdin.write(frame.data)
+            else:
+                # Fall back to OpenCV's writer, trying codecs in order of preference
+                fourcc_options = [
+                    cv2.VideoWriter_fourcc(*'avc1'),  # H.264 - best for web
+                    cv2.VideoWriter_fourcc(*'H264'),  # Alternative H.264
+                    cv2.VideoWriter_fourcc(*'X264'),  # x264 encoder
+                    cv2.VideoWriter_fourcc(*'mp4v'),  # Fallback
+                ]
                 
-                # Resize to original dimensions
-                frame = cv2.resize(cropped, (width, height), interpolation=cv2.INTER_LANCZOS4)
+                for fourcc in fourcc_options:
+                    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+                    if out.isOpened():
+                        print(f"[HuggingFace] Using codec: {fourcc}")
+                        break
+                    out.release()
                 
-                # Add subtle brightness variation (pulsing effect)
-                brightness_factor = 1.0 + (0.05 * np.sin(progress * np.pi * 2))
-                frame = np.clip(frame * brightness_factor, 0, 255).astype(np.uint8)
+                if out is None or not out.isOpened():
+                    raise Exception("Could not initialize video writer with any codec")
+                write_frame = out.write
+            
+            print(f"[HuggingFace] Generating {num_frames} frames at {fps} FPS with advanced animations...")
+            
+            # Ring of reusable output buffers: frame i renders into slot i % FRAME_PREFETCH,
+            # which is free again because frame i - FRAME_PREFETCH has already been written
+            frame_bufs = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(FRAME_PREFETCH)]
+            
+            band_rows = max(1, WARP_BAND_BYTES // (width * 3))
+            
+            # Warp on the GPU when OpenCV was built with CUDA; the source is uploaded once
+            gpu_src = None
+            if hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                gpu_src = cv2.cuda_GpuMat()
+                gpu_src.upload(img_bgr)
+                print("[HuggingFace] Warping frames on CUDA")
+            
+            def render_frame(i):
+                frame = frame_bufs[i % FRAME_PREFETCH]
+                cx = float(center_x[i])
+                cy = float(center_y[i])
                 
-                # Optional: Add slight rotation for first/last frames (smooth transition)
-                if i < fps * 0.5 or i > num_frames - (fps * 0.5):
-                    rotation_angle = 0.5 * np.sin(progress * np.pi * 2)
-                    M = cv2.getRotationMatrix2D((width/2, height/2), rotation_angle, 1.0)
-                    frame = cv2.warpAffine(frame, M, (width, height), borderMode=cv2.BORDER_REFLECT)
+                # Zoom + pan + rotation as one affine transform: scale/rotate about the
+                # view center, then translate that center to the middle of the frame
+                M = cv2.getRotationMatrix2D((cx, cy), float(rotation[i]), float(zoom[i]))
+                M[0, 2] += (width / 2) - cx
+                M[1, 2] += (height / 2) - cy
                 
-                # Convert RGB to BGR for OpenCV
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                if gpu_src is not None:
+                    gpu_frame = cv2.cuda.warpAffine(gpu_src, M, (width, height),
+                                                    flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+                    gpu_frame.download(dst=frame)
+                else:
+                    # Warp in horizontal bands; shifting the y translation maps each band's rows
+                    for y0 in range(0, height, band_rows):
+                        band = frame[y0:y0 + band_rows]
+                        M_band = M.copy()
+                        M_band[1, 2] -= y0
+                        cv2.warpAffine(img_bgr, M_band, (width, band.shape[0]), dst=band,
+                                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
                 
-                out.write(frame_bgr)
-            
-            out.release()
-            
-            # Verify the file was created and has content
-            if not os.path.exists(output_path):
-                raise Exception("Video file was not created")
+                # Apply brightness pulse
+                cv2.LUT(frame, brightness_luts[i], dst=frame)
+                return frame
+            
+            try:
+                # Render ahead on the pool while frames are written in order
+                with ThreadPoolExecutor(max_workers=FRAME_RENDER_WORKERS) as pool:
+                    pending = deque()
+                    for i in range(num_frames):
+                        pending.append(pool.submit(render_frame, i))
+                        if len(pending) >= FRAME_PREFETCH:
+                            write_frame(pending.popleft().result())
+                    while pending:
+                        write_frame(pending.popleft().result())
+            except Exception:
+                if encoder is not None:
+                    encoder.kill()
+                    encoder.wait()
+                raise
+            finally:
+                if out is not None:
+                    out.release()
             
-            file_size = os.path.getsize(output_path)
-            if file_size == 0:
-                raise Exception("Video file is empty")
+            if encoder is not None:
+                self._finish_encoder(encoder)
             
+            file_size = self._check_video_file(output_path)
             print(f"[HuggingFace] ✅ Fallback video created: {output_path} ({file_size} bytes)")
             
             return output_path
             
         except ImportError as e:
-            raise Exception(f"Required libraries not installed: {e}. Install with: pip install opencv-python pillow numpy")
+            if not NUMBA_AVAILABLE:
+                raise Exception(f"Required libraries not installed: {e}. Install with: pip install opencv-python numpy")
+        except Exception as e:
+            raise Exception(f"Failed to create animated video: {e}")
+        
+        # OpenCV is missing but Numba is installed: render with the JIT kernel instead
+        try:
+            return self._create_animated_video_numba(image_path, output_path, fps, duration)
         except Exception as e:
             raise Exception(f"Failed to create animated video: {e}")
     
+    def _create_animated_video_numba(self, image_path: str, output_path: str,
+                                     fps: int = ANIMATION_FPS, duration: int = ANIMATION_DURATION) -> str:
+        """Render the fallback animation without OpenCV (Pillow decode, Numba warp, ffmpeg encode)"""
+        from PIL import Image
+        
+        print("[HuggingFace] OpenCV not available: rendering animation with Numba")
+        
+        num_frames = fps * duration
+        
+        cache_key = _source_cache_key(image_path, 'numba', MAX_FRAME_PIXELS, fps, duration)
+        cached = _source_cache_get(cache_key)
+        if cached is not None:
+            src_bgr, zoom, center_x, center_y, rotation, brightness_luts = cached
+        else:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                if width * height > MAX_FRAME_PIXELS:
+                    # thumbnail() lets JPEGs decode at reduced scale (draft mode) before resampling;
+                    # bilinear is enough since every frame is re-warped anyway
+                    scale = math.sqrt(MAX_FRAME_PIXELS / (width * height))
+                    img.thumbnail((int(width * scale), int(height * scale)), Image.Resampling.BILINEAR)
+                src_bgr = np.asarray(img.convert('RGB'))[:, :, ::-1]
+            
+            height, width = src_bgr.shape[:2]
+            height -= height % 2
+            width -= width % 2
+            src_bgr = np.ascontiguousarray(src_bgr[:height, :width])
+            
+            zoom, center_x, center_y, rotation, brightness_luts = _animation_params(width, height, fps, num_frames)
+            _source_cache_put(cache_key, (src_bgr, zoom, center_x, center_y, rotation, brightness_luts))
+        
+        height, width = src_bgr.shape[:2]
+        
+        encoder = self._open_ffmpeg_encoder(output_path, width, height, fps)
+        if encoder is None:
+            raise Exception("ffmpeg is required to encode video when OpenCV is not installed")
+        
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        
+        try:
+            for i in range(num_frames):
+                m = _inverse_view_matrix(float(center_x[i]), float(center_y[i]), float(rotation[i]),
+                                         float(zoom[i]), width, height)
+                _warp_frame_numba(src_bgr, frame, *m, brightness_luts[i])
+                encoder.stdin.write(frame.data)
+        except Exception:
+            encoder.kill()
+            encoder.wait()
+            raise
+        
+        self._finish_encoder(encoder)
+        
+        file_size = self._check_video_file(output_path)
+        print(f"[HuggingFace] ✅ Fallback video created: {output_path} ({file_size} bytes)")
+        
+        return output_path
+    
+    def materialize(self, spec: VideoSpec, output_path: str) -> str:
+        """Write the video described by spec to output_path, reusing a cached render when present"""
+        cache_path = spec.cache_path
+        try:
+            shutil.copyfile(cache_path, output_path)
+            os.utime(cache_path)  # mark as recently used
+            print(f"[AI Service] Reusing cached animation: {cache_path}")
+            return output_path
+        except OSError:
+            pass
+        
+        self._create_animated_video_fallback(spec.image_path, output_path, spec.fps, spec.duration)
+        self._store_render(output_path, cache_path)
+        return output_path
+    
+    @staticmethod
+    def _store_render(video_path: str, cache_path: str) -> None:
+        """Copy a finished render into the cache and evict the least recently used entries"""
+        try:
+            os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(video_path, tmp_path)
+            os.replace(tmp_path, cache_path)
+            
+            with os.scandir(RENDER_CACHE_DIR) as it:
+                entries = [e for e in it if e.name.endswith('.mp4')]
+            if len(entries) > RENDER_CACHE_SIZE:
+                entries.sort(key=lambda e: e.stat().st_mtime)
+                for entry in entries[:len(entries) - RENDER_CACHE_SIZE]:
+                    os.remove(entry.path)
+        except OSError as e:
+            print(f"[AI Service] ⚠️ Could not update animation cache: {e}")
+    
     def image_to_video(self, image_path: str, output_path: str = None, 
                        model: str = "stabilityai/stable-video-diffusion-img2vid-xt") -> str:
         """
@@ -174,7 +515,8 @@ class HuggingFaceService:
         print(f"[AI Service] DeepAI API key configured: {self.deepai_key[:20]}...")
         print(f"[AI Service] Using optimized local video generation (DeepAI has no video endpoint)")
         print(f"[AI Service] Output path: {output_path}")
-        return self._create_animated_video_fallback(image_path, output_path)
+        spec = VideoSpec(image_path, hashlib.sha256(image_bytes).hexdigest())
+        return self.materialize(spec, output_path)
         
         # DeepAI API attempt (kept for reference if they add video endpoints)
         """
@@ -182,7 +524,7 @@ class HuggingFaceService:
             print(f"[AI Service] Attempting DeepAI image-to-video conversion...")
             
             with open(image_path, 'rb') as img_file:
-                response = requests.post(
+                response = self._session.post(
                     "https://api.deepai.org/api/video-generator",
                     files={'image': img_file},
                     headers={'api-key': self.deepai_key},
@@ -201,25 +543,17 @@ class HuggingFaceService:
                     video_url = result['output_url']
                     print(f"[AI Service] Downloading video from: {video_url}")
                     
-                    # Download the video
-                    video_response = requests.get(video_url, timeout=60)
-                    
-                    if video_response.status_code == 200:
-                        # Save video
-                        if output_path is None:
-                            base_name = os.path.splitext(image_path)[0]
-                            output_path = f"{base_name}_animated.mp4"
-                        
-                        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-                        
-                        with open(output_path, 'wb') as f:
-                            f.write(video_response.content)
-                            f.flush()
-                            os.fsync(f.fileno())
-                        
-                        video_size = os.path.getsize(output_path)
-                        print(f"[AI Service] ✅ DeepAI video generated: {output_path} ({video_size} bytes)")
-                        return output_path
+                    # Download the video straight to disk
+                    with self._session.get(video_url, stream=True, timeout=60) as video_response:
+                        if video_response.status_code == 200:
+                            # Save video
+                            if output_path is None:
+                                base_name = os.path.splitext(image_path)[0]
+                                output_path = f"{base_name}_animated.mp4"
+                            
+                            video_size = self._stream_response_to_file(video_response, output_path)
+                            print(f"[AI Service] ✅ DeepAI video generated: {output_path} ({video_size} bytes)")
+                            return output_path
             
             # If DeepAI fails, use fallback
             print(f"[AI Service] DeepAI failed (status {response.status_code}), using fallback")
@@ -231,10 +565,11 @@ class HuggingFaceService:
         # HuggingFace API code (requires PRO subscription) - kept for reference
         """
         try:
-            response = requests.post(
+            response = self._session.post(
                 url,
                 headers=self.headers,
                 data=image_bytes,
+                stream=True,
                 timeout=300  # 5 minutes timeout for video generation
             )
             
@@ -268,20 +603,12 @@ class HuggingFaceService:
                 except:
                     pass
             
-            video_bytes = response.content
-            print(f"[HuggingFace] Received {len(video_bytes)} bytes of video data")
-            
-            # Save video
+            # Save video, streaming the body to disk
             if output_path is None:
                 base_name = os.path.splitext(image_path)[0]
                 output_path = f"{base_name}_animated.mp4"
             
-            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-            
-            with open(output_path, 'wb') as f:
-                f.write(video_bytes)
-                f.flush()
-                os.fsync(f.fileno())
+            self._stream_response_to_file(response, output_path)
             
             # Verify file was written
             if not os.path.exists(output_path):
@@ -326,7 +653,7 @@ class HuggingFaceService:
         
         url = f"{self.base_url}/{model}"
         
-        response = requests.post(
+        response = self._session.post(
             url,
             headers=self.headers,
             data=image_bytes,
@@ -4,17 +4,211 @@ Learns from user feedback to continuously improve accuracy
 Uses reinforcement learning principles to optimize video generation
 """
 
+import functools
 import json
 import os
+import random
+import re
+import sqlite3
+import threading
 import time
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Element categories reported by _extract_key_elements ("settings" has no vocabulary yet)
+ELEMENT_CATEGORIES = ("subjects", "settings", "time_of_day", "mood", "colors", "actions")
+
+# Prompts whose keyword matches and pattern keys are memoized
+PROMPT_CACHE_SIZE = 4096
+
+# Examples, search queries and videos kept per pattern (uniform reservoir sample)
+PATTERN_SAMPLE_SIZE = 100
+
+# Per-pattern counters behind the reservoirs and the running duration mean
+PATTERN_COUNTER_COLUMNS = (
+    ("examples_seen", "INTEGER NOT NULL DEFAULT 0"),
+    ("queries_seen", "INTEGER NOT NULL DEFAULT 0"),
+    ("videos_seen", "INTEGER NOT NULL DEFAULT 0"),
+    ("duration_total", "REAL NOT NULL DEFAULT 0"),
+)
+
+# Keyword vocabulary per category; order matters, pattern keys use the first match
+KEYWORDS = {
+    "subjects": (
+        'ocean', 'sea', 'beach', 'mountain', 'forest', 'city', 'street',
+        'waterfall', 'sunset', 'sunrise', 'sky', 'cloud', 'tree', 'flower',
+        'building', 'road', 'bridge', 'lake', 'river', 'desert', 'snow',
+        'rain', 'storm', 'fire', 'water', 'wave', 'bird', 'animal'
+    ),
+    "time_of_day": ('morning', 'afternoon', 'evening', 'night', 'dawn', 'dusk',
+                    'sunset', 'sunrise', 'golden hour', 'blue hour'),
+    "mood": ('peaceful', 'calm', 'serene', 'dramatic', 'energetic', 'vibrant',
+             'tranquil', 'majestic', 'beautiful', 'stunning', 'breathtaking'),
+    "colors": ('blue', 'turquoise', 'golden', 'red', 'green', 'crystal clear',
+               'bright', 'dark', 'colorful', 'white', 'black'),
+    "actions": ('crashing', 'flowing', 'moving', 'walking', 'running', 'flying',
+                'cascading', 'swaying', 'dancing', 'shining', 'glowing'),
+}
+
+
+def _json_loads(data: bytes):
+    """Decode JSON from bytes, with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(data) -> bytes:
+    """Encode data as UTF-8 JSON bytes, with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def _keyword_payloads() -> Dict[str, Tuple[Tuple[str, int], ...]]:
+    """Every distinct keyword mapped to each (category, rank) it appears under"""
+    payloads = {}
+    for category, words in KEYWORDS.items():
+        for rank, word in enumerate(words):
+            payloads.setdefault(word, []).append((category, rank))
+    return {word: tuple(matches) for word, matches in payloads.items()}
+
+
+def _build_keyword_automaton():
+    """Build one Aho-Corasick automaton over every keyword, payload [(category, rank), ...]"""
+    automaton = ahocorasick.Automaton()
+    for word, matches in _keyword_payloads().items():
+        automaton.add_word(word, matches)
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_keyword_table():
+    """Pack every keyword into one byte buffer plus offset/length arrays for the JIT scanner"""
+    payloads = _keyword_payloads()
+    encoded = [word.encode("ascii") for word in payloads]
+    lengths = np.array([len(word) for word in encoded], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return buffer, offsets, lengths, tuple(payloads.values())
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _scan_keywords(prompt_bytes, buffer, offsets, lengths):
+        """Flag every keyword occurring anywhere in prompt_bytes (ASCII keywords, UTF-8 prompt)"""
+        hits = np.zeros(offsets.shape[0], dtype=np.bool_)
+        n = prompt_bytes.shape[0]
+        for i in range(n):
+            for k in range(offsets.shape[0]):
+                if hits[k] or i + lengths[k] > n:
+                    continue
+                start = offsets[k]
+                j = 0
+                while j < lengths[k] and prompt_bytes[i + j] == buffer[start + j]:
+                    j += 1
+                if j == lengths[k]:
+                    hits[k] = True
+        return hits
+
+
+def _build_keyword_regex():
+    """
+    Build one alternation over every keyword for use without pyahocorasick
+    
+    The zero-width lookahead tries every start position and the longest-first
+    alternation reports the longest keyword there; each keyword maps to every
+    (category, rank) it contains, so nested words ("water" in "waterfall") still count.
+    """
+    words = sorted({word for words in KEYWORDS.values() for word in words}, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, words)) + "))")
+    contained = {
+        word: tuple((category, rank)
+                    for category, vocabulary in KEYWORDS.items()
+                    for rank, other in enumerate(vocabulary)
+                    if other in word)
+        for word in words
+    }
+    return pattern, contained
+
+
+# Scanner preference: Aho-Corasick automaton, then the Numba byte scanner, then one regex
+_KEYWORD_AUTOMATON = _build_keyword_automaton() if AHOCORASICK_AVAILABLE else None
+_USE_NUMBA_SCAN = NUMBA_AVAILABLE and not AHOCORASICK_AVAILABLE
+_KEYWORD_TABLE = _build_keyword_table() if _USE_NUMBA_SCAN else None
+_KEYWORD_RE, _KEYWORD_MATCHES = (
+    (None, None) if AHOCORASICK_AVAILABLE or _USE_NUMBA_SCAN else _build_keyword_regex()
+)
+
+
+def _sample_in_order(items: List, k: int = PATTERN_SAMPLE_SIZE) -> List:
+    """Uniform sample of at most k items, keeping their original order"""
+    if len(items) <= k:
+        return list(items)
+    return [items[i] for i in sorted(random.sample(range(len(items)), k))]
+
+
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _extract_key_elements_cached(prompt: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Keyword matches per category for a prompt, as a hashable tuple of (category, words)"""
+    prompt_lower = prompt.lower()
+    
+    # One pass over the prompt; payload rank keeps results in vocabulary order
+    if AHOCORASICK_AVAILABLE:
+        hits = (matches for _, matches in _KEYWORD_AUTOMATON.iter(prompt_lower))
+    elif _USE_NUMBA_SCAN:
+        buffer, offsets, lengths, payloads = _KEYWORD_TABLE
+        prompt_bytes = np.frombuffer(prompt_lower.encode("utf-8"), dtype=np.uint8)
+        flags = _scan_keywords(prompt_bytes, buffer, offsets, lengths)
+        hits = (payloads[k] for k in np.flatnonzero(flags))
+    else:
+        hits = (_KEYWORD_MATCHES[m.group(1)] for m in _KEYWORD_RE.finditer(prompt_lower))
+    
+    found = {category: set() for category in ELEMENT_CATEGORIES}
+    for matches in hits:
+        for category, rank in matches:
+            found[category].add(rank)
+    
+    return tuple(
+        (category, tuple(KEYWORDS[category][rank] for rank in sorted(ranks)))
+        for category, ranks in found.items()
+    )
+
+
+@functools.lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _pattern_key_cached(prompt: str) -> str:
+    """Pattern key from the first subject, time of day and mood found in a prompt"""
+    elements = dict(_extract_key_elements_cached(prompt))
+    key_parts = [elements[category][0]
+                 for category in ("subjects", "time_of_day", "mood")
+                 if elements[category]]
+    return "_".join(key_parts) if key_parts else "general"
+
+
 class IntelligentTrainer:
     """
     Self-learning system that improves video generation accuracy through user feedback
@@ -24,35 +218,258 @@ class IntelligentTrainer:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
-        self.feedback_file = self.data_dir / "user_feedback.json"
+        self.feedback_file = self.data_dir / "user_feedback.jsonl"
         self.prompt_patterns_file = self.data_dir / "successful_patterns.json"
         self.query_optimization_file = self.data_dir / "query_optimizations.json"
         self.video_preferences_file = self.data_dir / "video_preferences.json"
+        self.patterns_db_file = self.data_dir / "patterns.db"
+        
+        self._migrate_legacy_feedback()
         
-        self.feedback_history = self._load_json(self.feedback_file, [])
-        self.successful_patterns = self._load_json(self.prompt_patterns_file, {})
-        self.query_optimizations = self._load_json(self.query_optimization_file, {})
-        self.video_preferences = self._load_json(self.video_preferences_file, {})
+        # Learned patterns live in SQLite so each feedback event is a few indexed
+        # row writes instead of a rewrite of every pattern; _db_lock guards the connection
+        self._db_lock = threading.Lock()
+        self._db = self._open_patterns_db()
         
-        logger.info(f" Intelligent Trainer initialized with {len(self.feedback_history)} training examples")
+        # Remaining stores are loaded on first access, so a trainer that is only
+        # asked for one of them never parses the others
+        logger.info(f" Intelligent Trainer initialized from {self.data_dir}")
+    
+    @functools.cached_property
+    def feedback_history(self) -> List[Dict]:
+        return self._load_feedback()
+    
+    @property
+    def successful_patterns(self) -> Dict:
+        """Snapshot of every learned pattern in the old JSON layout (for inspection/export)"""
+        with self._db_lock:
+            patterns = {
+                key: {
+                    "count": count,
+                    "examples": [],
+                    "key_elements": _json_loads(key_elements),
+                    "search_queries": [],
+                    "video_characteristics": []
+                }
+                for key, count, key_elements in self._db.execute(
+                    'SELECT key, count, key_elements FROM patterns')
+            }
+            for key, prompt in self._db.execute('SELECT key, prompt FROM pattern_examples ORDER BY id'):
+                patterns[key]["examples"].append(prompt)
+            for key, query in self._db.execute('SELECT key, query FROM pattern_queries ORDER BY id'):
+                patterns[key]["search_queries"].append(query)
+            for key, width, height, duration, quality in self._db.execute(
+                    'SELECT key, width, height, duration, quality FROM pattern_videos ORDER BY id'):
+                patterns[key]["video_characteristics"].append({
+                    "resolution": f"{width}x{height}",
+                    "duration": duration,
+                    "quality": quality
+                })
+        return patterns
+    
+    @property
+    def query_optimizations(self) -> Dict:
+        """Snapshot of failed queries and suggestions per pattern in the old JSON layout"""
+        optimizations = {}
+        with self._db_lock:
+            for key, query, reason, timestamp in self._db.execute(
+                    'SELECT key, query, reason, timestamp FROM failed_queries ORDER BY id'):
+                entry = optimizations.setdefault(key, {"failed_queries": [], "suggestions": []})
+                entry["failed_queries"].append({"query": query, "reason": reason, "timestamp": timestamp})
+            for key, suggestion in self._db.execute('SELECT key, suggestion FROM query_suggestions ORDER BY id'):
+                entry = optimizations.setdefault(key, {"failed_queries": [], "suggestions": []})
+                entry["suggestions"].append(suggestion)
+        return optimizations
+    
+    @functools.cached_property
+    def video_preferences(self) -> Dict:
+        return self._load_json(self.video_preferences_file, {})
     
     def _load_json(self, filepath: Path, default):
         """Load JSON data with fallback to default"""
         if filepath.exists():
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return _json_loads(filepath.read_bytes())
             except:
                 return default
         return default
     
-    def _save_json(self, filepath: Path, data):
-        """Save data to JSON file"""
+    def _open_patterns_db(self) -> sqlite3.Connection:
+        """Open (creating if needed) the pattern store, importing the old JSON files once"""
+        is_new = not self.patterns_db_file.exists()
+        db = sqlite3.connect(self.patterns_db_file, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(
+            'CREATE TABLE IF NOT EXISTS patterns ('
+            'key TEXT PRIMARY KEY, '
+            'count INTEGER NOT NULL, '
+            'key_elements TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS pattern_examples ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL, '
+            'prompt TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS pattern_queries ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL, '
+            'query TEXT NOT NULL, '
+            'UNIQUE (key, query));'
+            'CREATE TABLE IF NOT EXISTS pattern_videos ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL, '
+            'width INTEGER, '
+            'height INTEGER, '
+            'duration REAL, '
+            'quality TEXT);'
+            'CREATE TABLE IF NOT EXISTS failed_queries ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL, '
+            'query TEXT, '
+            'reason TEXT, '
+            'timestamp TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS query_suggestions ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL, '
+            'suggestion TEXT NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS idx_pattern_examples_key ON pattern_examples(key, id);'
+            'CREATE INDEX IF NOT EXISTS idx_pattern_videos_key ON pattern_videos(key, id);'
+            'CREATE INDEX IF NOT EXISTS idx_failed_queries_key ON failed_queries(key, id);'
+            'CREATE INDEX IF NOT EXISTS idx_query_suggestions_key ON query_suggestions(key, id);'
+        )
+        
+        # Stores created before the reservoir counters existed get them backfilled
+        columns = {row[1] for row in db.execute('PRAGMA table_info(patterns)')}
+        missing = [(name, decl) for name, decl in PATTERN_COUNTER_COLUMNS if name not in columns]
+        if missing:
+            with db:
+                for name, decl in missing:
+                    db.execute(f'ALTER TABLE patterns ADD COLUMN {name} {decl}')
+                db.execute(
+                    'UPDATE patterns SET '
+                    'examples_seen = (SELECT COUNT(*) FROM pattern_examples e WHERE e.key = patterns.key), '
+                    'queries_seen = (SELECT COUNT(*) FROM pattern_queries q WHERE q.key = patterns.key), '
+                    'videos_seen = (SELECT COUNT(*) FROM pattern_videos v WHERE v.key = patterns.key), '
+                    'duration_total = (SELECT COALESCE(SUM(COALESCE(duration, 10)), 0) '
+                    'FROM pattern_videos v WHERE v.key = patterns.key)'
+                )
+        
+        if is_new:
+            with db:
+                self._import_json_patterns(db)
+        return db
+    
+    def _import_json_patterns(self, db: sqlite3.Connection):
+        """Copy successful_patterns.json / query_optimizations.json into a fresh store"""
+        for key, pattern in self._load_json(self.prompt_patterns_file, {}).items():
+            examples = pattern.get("examples", [])
+            queries = list(dict.fromkeys(pattern.get("search_queries", [])))
+            videos = []
+            for video in pattern.get("video_characteristics", []):
+                width, _, height = str(video.get("resolution", "0x0")).partition("x")
+                videos.append((key, int(width or 0), int(height or 0),
+                               video.get("duration", 10), video.get("quality", "unknown")))
+            duration_total = sum(video[3] if video[3] is not None else 10 for video in videos)
+            
+            db.execute('INSERT INTO patterns (key, count, key_elements, examples_seen, queries_seen, '
+                       'videos_seen, duration_total) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (key, pattern.get("count", 0),
+                        _json_dumps(pattern.get("key_elements", {})).decode('utf-8'),
+                        len(examples), len(queries), len(videos), duration_total))
+            # Oversized lists are cut down to the same uniform sample a reservoir would hold;
+            # the first query is always kept because optimize_prompt reuses it
+            db.executemany('INSERT INTO pattern_examples (key, prompt) VALUES (?, ?)',
+                           [(key, prompt) for prompt in _sample_in_order(examples)])
+            db.executemany('INSERT INTO pattern_queries (key, query) VALUES (?, ?)',
+                           [(key, query) for query in queries[:1] + _sample_in_order(queries[1:], PATTERN_SAMPLE_SIZE - 1)])
+            db.executemany('INSERT INTO pattern_videos (key, width, height, duration, quality) '
+                           'VALUES (?, ?, ?, ?, ?)', _sample_in_order(videos))
+        
+        for key, entry in self._load_json(self.query_optimization_file, {}).items():
+            db.executemany('INSERT INTO failed_queries (key, query, reason, timestamp) VALUES (?, ?, ?, ?)',
+                           [(key, failed.get("query"), failed.get("reason"), failed.get("timestamp", ""))
+                            for failed in entry.get("failed_queries", [])])
+            db.executemany('INSERT INTO query_suggestions (key, suggestion) VALUES (?, ?)',
+                           [(key, suggestion) for suggestion in entry.get("suggestions", [])])
+    
+    def _reservoir_add(self, table: str, columns: Tuple[str, ...], pattern_key: str, seen: int,
+                       values: Tuple, keep_first: bool = False):
+        """
+        Offer one row to a pattern's reservoir of at most PATTERN_SAMPLE_SIZE rows
+        
+        seen is how many rows were offered before this one. Once the reservoir is
+        full, the row replaces a random one with probability PATTERN_SAMPLE_SIZE / (seen + 1),
+        which keeps the rows a uniform sample of everything offered. With keep_first the
+        oldest row is never replaced. Caller holds _db_lock inside a transaction.
+        """
+        if seen < PATTERN_SAMPLE_SIZE:
+            placeholders = ", ".join("?" * (len(columns) + 1))
+            self._db.execute(f'INSERT INTO {table} (key, {", ".join(columns)}) VALUES ({placeholders})',
+                             (pattern_key,) + tuple(values))
+            return
+        
+        slot = random.randrange(seen + 1)
+        if slot >= PATTERN_SAMPLE_SIZE or (keep_first and slot == 0):
+            return
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        self._db.execute(
+            f'UPDATE {table} SET {assignments} WHERE id = '
+            f'(SELECT id FROM {table} WHERE key = ? ORDER BY id LIMIT 1 OFFSET ?)',
+            tuple(values) + (pattern_key, slot)
+        )
+    
+    def _pattern_count(self, pattern_key: str) -> int:
+        """Number of successful examples recorded for a pattern (0 if unknown)"""
+        with self._db_lock:
+            row = self._db.execute('SELECT count FROM patterns WHERE key = ?', (pattern_key,)).fetchone()
+        return row[0] if row else 0
+    
+    def _migrate_legacy_feedback(self):
+        """Convert the old single-array user_feedback.json to JSON Lines once"""
+        legacy_file = self.data_dir / "user_feedback.json"
+        if not self.feedback_file.exists() and legacy_file.exists():
+            for entry in self._load_json(legacy_file, []):
+                self._append_jsonl(self.feedback_file, entry)
+    
+    def _iter_feedback(self):
+        """Stream feedback entries from the JSON Lines file one at a time"""
+        if not self.feedback_file.exists():
+            return
+        with open(self.feedback_file, 'rb') as f:
+            for line in f:
+                try:
+                    yield _json_loads(line)
+                except ValueError:
+                    continue  # Skip a line truncated by an interrupted write
+    
+    def _load_feedback(self) -> List[Dict]:
+        """Load feedback history from the JSON Lines file"""
+        return list(self._iter_feedback())
+    
+    @functools.cached_property
+    def _feedback_stats(self) -> Dict:
+        """Running feedback counters, built by one streaming pass over the history"""
+        stats = {"total": 0, "rated": 0, "rating_sum": 0, "successful": 0}
+        for entry in self._iter_feedback():
+            self._count_feedback(stats, entry)
+        return stats
+    
+    @staticmethod
+    def _count_feedback(stats: Dict, entry: Dict):
+        """Fold one feedback entry into the running counters"""
+        stats["total"] += 1
+        if "rating" in entry:
+            stats["rated"] += 1
+            stats["rating_sum"] += entry["rating"]
+        if entry.get("rating", 0) >= 4:
+            stats["successful"] += 1
+    
+    def _append_jsonl(self, filepath: Path, entry):
+        """Append one record to a JSON Lines file"""
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(filepath, 'ab', buffering=1 << 16) as f:
+                f.write(_json_dumps(entry) + b"\n")
         except Exception as e:
-            logger.error(f"Failed to save {filepath}: {e}")
+            logger.error(f"Failed to append to {filepath}: {e}")
     
     def record_user_feedback(self, prompt: str, generated_content: Dict, 
                             user_rating: int, user_comments: str = "") -> None:
@@ -74,8 +491,12 @@ class IntelligentTrainer:
             "learned": False
         }
         
-        self.feedback_history.append(feedback_entry)
-        self._save_json(self.feedback_file, self.feedback_history)
+        # Only keep in-memory views in step if something already loaded them
+        if "feedback_history" in self.__dict__:
+            self.feedback_history.append(feedback_entry)
+        if "_feedback_stats" in self.__dict__:
+            self._count_feedback(self._feedback_stats, feedback_entry)
+        self._append_jsonl(self.feedback_file, feedback_entry)
         
         if user_rating >= 4:
             self._learn_from_success(prompt, generated_content)
@@ -91,32 +512,47 @@ class IntelligentTrainer:
         
         pattern_key = self._get_pattern_key(prompt)
         
-        if pattern_key not in self.successful_patterns:
-            self.successful_patterns[pattern_key] = {
-                "count": 0,
-                "examples": [],
-                "key_elements": key_elements,
-                "search_queries": [],
-                "video_characteristics": []
-            }
-        
-        self.successful_patterns[pattern_key]["count"] += 1
-        self.successful_patterns[pattern_key]["examples"].append(prompt)
-        
-        if "search_query" in generated_content:
-            query = generated_content["search_query"]
-            if query not in self.successful_patterns[pattern_key]["search_queries"]:
-                self.successful_patterns[pattern_key]["search_queries"].append(query)
-        
-        if "videos" in generated_content:
-            for video in generated_content["videos"]:
-                self.successful_patterns[pattern_key]["video_characteristics"].append({
-                    "resolution": f"{video.get('width', 0)}x{video.get('height', 0)}",
-                    "duration": video.get("duration", 0),
-                    "quality": video.get("quality", "unknown")
-                })
-        
-        self._save_json(self.prompt_patterns_file, self.successful_patterns)
+        videos = generated_content.get("videos", [])
+        
+        with self._db_lock, self._db:
+            # key_elements is kept from the pattern's first example
+            self._db.execute(
+                'INSERT INTO patterns (key, count, key_elements) VALUES (?, 1, ?) '
+                'ON CONFLICT(key) DO UPDATE SET count = count + 1',
+                (pattern_key, _json_dumps(key_elements).decode('utf-8'))
+            )
+            examples_seen, queries_seen, videos_seen = self._db.execute(
+                'SELECT examples_seen, queries_seen, videos_seen FROM patterns WHERE key = ?', (pattern_key,)
+            ).fetchone()
+            
+            self._reservoir_add('pattern_examples', ('prompt',), pattern_key, examples_seen, (prompt,))
+            examples_seen += 1
+            
+            if "search_query" in generated_content:
+                query = generated_content["search_query"]
+                known = self._db.execute('SELECT 1 FROM pattern_queries WHERE key = ? AND query = ?',
+                                         (pattern_key, query)).fetchone()
+                if not known:
+                    # optimize_prompt reuses the first query, so it is never evicted
+                    self._reservoir_add('pattern_queries', ('query',), pattern_key, queries_seen, (query,),
+                                        keep_first=True)
+                    queries_seen += 1
+            
+            duration_added = 0
+            for video in videos:
+                duration = video.get("duration", 0)
+                self._reservoir_add('pattern_videos', ('width', 'height', 'duration', 'quality'),
+                                    pattern_key, videos_seen,
+                                    (video.get('width', 0), video.get('height', 0), duration,
+                                     video.get("quality", "unknown")))
+                videos_seen += 1
+                duration_added += duration if duration is not None else 10
+            
+            self._db.execute(
+                'UPDATE patterns SET examples_seen = ?, queries_seen = ?, videos_seen = ?, '
+                'duration_total = duration_total + ? WHERE key = ?',
+                (examples_seen, queries_seen, videos_seen, duration_added, pattern_key)
+            )
     
     def _learn_from_failure(self, prompt: str, generated_content: Dict, comments: str):
         """Learn what NOT to do from failed generations"""
@@ -125,96 +561,21 @@ class IntelligentTrainer:
         
         if "search_query" in generated_content:
             query = generated_content["search_query"]
-            
-            if pattern_key not in self.query_optimizations:
-                self.query_optimizations[pattern_key] = {
-                    "failed_queries": [],
-                    "suggestions": []
-                }
-            
-            self.query_optimizations[pattern_key]["failed_queries"].append({
-                "query": query,
-                "reason": comments,
-                "timestamp": datetime.now().isoformat()
-            })
-            
             suggestions = self._generate_improvement_suggestions(prompt, comments)
-            self.query_optimizations[pattern_key]["suggestions"].extend(suggestions)
-        
-        self._save_json(self.query_optimization_file, self.query_optimizations)
+            
+            with self._db_lock, self._db:
+                self._db.execute('INSERT INTO failed_queries (key, query, reason, timestamp) VALUES (?, ?, ?, ?)',
+                                 (pattern_key, query, comments, datetime.now().isoformat()))
+                self._db.executemany('INSERT INTO query_suggestions (key, suggestion) VALUES (?, ?)',
+                                     [(pattern_key, suggestion) for suggestion in suggestions])
     
     def _extract_key_elements(self, prompt: str) -> Dict:
         """Extract key visual elements from prompt"""
-        import re
-        
-        prompt_lower = prompt.lower()
-        
-        elements = {
-            "subjects": [],
-            "settings": [],
-            "time_of_day": [],
-            "mood": [],
-            "colors": [],
-            "actions": []
-        }
-        
-        subjects = [
-            'ocean', 'sea', 'beach', 'mountain', 'forest', 'city', 'street',
-            'waterfall', 'sunset', 'sunrise', 'sky', 'cloud', 'tree', 'flower',
-            'building', 'road', 'bridge', 'lake', 'river', 'desert', 'snow',
-            'rain', 'storm', 'fire', 'water', 'wave', 'bird', 'animal'
-        ]
-        
-        times = ['morning', 'afternoon', 'evening', 'night', 'dawn', 'dusk', 
-                'sunset', 'sunrise', 'golden hour', 'blue hour']
-        
-        moods = ['peaceful', 'calm', 'serene', 'dramatic', 'energetic', 'vibrant',
-                'tranquil', 'majestic', 'beautiful', 'stunning', 'breathtaking']
-        
-        colors = ['blue', 'turquoise', 'golden', 'red', 'green', 'crystal clear',
-                 'bright', 'dark', 'colorful', 'white', 'black']
-        
-        actions = ['crashing', 'flowing', 'moving', 'walking', 'running', 'flying',
-                  'cascading', 'swaying', 'dancing', 'shining', 'glowing']
-        
-        for subject in subjects:
-            if subject in prompt_lower:
-                elements["subjects"].append(subject)
-        
-        for time_word in times:
-            if time_word in prompt_lower:
-                elements["time_of_day"].append(time_word)
-        
-        for mood in moods:
-            if mood in prompt_lower:
-                elements["mood"].append(mood)
-        
-        for color in colors:
-            if color in prompt_lower:
-                elements["colors"].append(color)
-        
-        for action in actions:
-            if action in prompt_lower:
-                elements["actions"].append(action)
-        
-        return elements
+        return {category: list(words) for category, words in _extract_key_elements_cached(prompt)}
     
     def _get_pattern_key(self, prompt: str) -> str:
         """Generate a pattern key for categorizing similar prompts"""
-        elements = self._extract_key_elements(prompt)
-        
-        key_parts = []
-        
-        if elements["subjects"]:
-            key_parts.append(elements["subjects"][0])
-        
-        if elements["time_of_day"]:
-            key_parts.append(elements["time_of_day"][0])
-        
-        if elements["mood"]:
-            key_parts.append(elements["mood"][0])
-        
-        return "_".join(key_parts) if key_parts else "general"
+        return _pattern_key_cached(prompt)
     
     def optimize_prompt(self, prompt: str) -> str:
         """
@@ -224,13 +585,17 @@ class IntelligentTrainer:
         """
         pattern_key = self._get_pattern_key(prompt)
         
-        if pattern_key in self.successful_patterns:
-            pattern = self.successful_patterns[pattern_key]
+        with self._db_lock:
+            row = self._db.execute(
+                'SELECT p.count, (SELECT q.query FROM pattern_queries q WHERE q.key = p.key ORDER BY q.id LIMIT 1) '
+                'FROM patterns p WHERE p.key = ?', (pattern_key,)
+            ).fetchone()
+        
+        if row:
+            count, successful_query = row
             
-            if pattern["search_queries"] and pattern["count"] >= 3:
-                logger.info(f" Found {pattern['count']} successful examples for this pattern")
-                
-                successful_query = pattern["search_queries"][0]
+            if successful_query is not None and count >= 3:
+                logger.info(f" Found {count} successful examples for this pattern")
                 
                 return self._apply_successful_structure(prompt, successful_query)
         
@@ -256,18 +621,20 @@ class IntelligentTrainer:
             "confidence": 0.5
         }
         
-        if pattern_key in self.successful_patterns:
-            pattern = self.successful_patterns[pattern_key]
+        with self._db_lock:
+            row = self._db.execute('SELECT count, videos_seen, duration_total FROM patterns WHERE key = ?',
+                                   (pattern_key,)).fetchone()
+        count, videos_seen, duration_total = row or (0, 0, 0)
+        
+        if count >= 5:
+            strategy["confidence"] = 0.9
             
-            if pattern["count"] >= 5:
-                strategy["confidence"] = 0.9
-                
-                if pattern["video_characteristics"]:
-                    durations = [v.get("duration", 10) for v in pattern["video_characteristics"]]
-                    avg_duration = sum(durations) / len(durations)
-                    strategy["min_duration"] = max(3, int(avg_duration * 0.5))
-                
-                logger.info(f" High confidence strategy ({pattern['count']} examples)")
+            # Running mean over every video ever recorded, not just the kept sample
+            if videos_seen:
+                avg_duration = duration_total / videos_seen
+                strategy["min_duration"] = max(3, int(avg_duration * 0.5))
+            
+            logger.info(f" High confidence strategy ({count} examples)")
         
         return strategy
     
@@ -294,7 +661,8 @@ class IntelligentTrainer:
     
     def get_training_stats(self) -> Dict:
         """Get statistics about the training data"""
-        total_feedback = len(self.feedback_history)
+        stats = self._feedback_stats
+        total_feedback = stats["total"]
         
         if total_feedback == 0:
             return {
@@ -304,16 +672,18 @@ class IntelligentTrainer:
                 "confidence": 0
             }
         
-        ratings = [f["rating"] for f in self.feedback_history if "rating" in f]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
+        avg_rating = stats["rating_sum"] / stats["rated"] if stats["rated"] else 0
+        
+        successful = stats["successful"]
         
-        successful = len([f for f in self.feedback_history if f.get("rating", 0) >= 4])
+        with self._db_lock:
+            learned_patterns, = self._db.execute('SELECT COUNT(*) FROM patterns').fetchone()
         
         return {
             "total_examples": total_feedback,
             "successful_examples": successful,
             "average_rating": round(avg_rating, 2),
-            "learned_patterns": len(self.successful_patterns),
+            "learned_patterns": learned_patterns,
             "confidence": min(1.0, successful / 20),  # Confidence increases with successful examples
             "success_rate": round((successful / total_feedback * 100), 1) if total_feedback > 0 else 0
         }
@@ -338,11 +708,9 @@ class IntelligentTrainer:
         if len(prompt.split()) < 5:
             suggestions.append(" Add more details - longer prompts get better results")
         
-        pattern_key = self._get_pattern_key(prompt)
-        if pattern_key in self.successful_patterns:
-            pattern = self.successful_patterns[pattern_key]
-            if pattern["count"] >= 3:
-                suggestions.insert(0, f" Similar prompts have {pattern['count']} successful examples")
+        count = self._pattern_count(self._get_pattern_key(prompt))
+        if count >= 3:
+            suggestions.insert(0, f" Similar prompts have {count} successful examples")
         
         return suggestions
 
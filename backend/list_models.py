@@ -1,12 +1,40 @@
-import google.generativeai as genai
-from config import GEMINI_API_KEY
+import json
+import sys
+import time
+from pathlib import Path
 
-genai.configure(api_key=GEMINI_API_KEY)
+# Model list is cached here for a day; pass --refresh to query Gemini again
+CACHE_FILE = Path.home() / ".cache" / "genai" / "models.json"
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+def fetch_models():
+    import google.generativeai as genai
+    from config import GEMINI_API_KEY
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    return [
+        {
+            "name": model.name,
+            "display_name": model.display_name,
+            "description": model.description or "",
+            "methods": list(model.supported_generation_methods)
+        }
+        for model in genai.list_models()
+    ]
+
+def load_models(refresh=False):
+    if not refresh and CACHE_FILE.exists() and time.time() - CACHE_FILE.stat().st_mtime < CACHE_TTL_SECONDS:
+        return json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+
+    models = fetch_models()
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_FILE.write_text(json.dumps(models), encoding="utf-8")
+    return models
 
 print("🔍 Listing available Gemini models:\n")
-for model in genai.list_models():
-    if 'generateContent' in model.supported_generation_methods:
-        print(f"✅ {model.name}")
-        print(f"   Display Name: {model.display_name}")
-        print(f"   Description: {model.description[:80]}...")
+for model in load_models(refresh="--refresh" in sys.argv):
+    if 'generateContent' in model["methods"]:
+        print(f"✅ {model['name']}")
+        print(f"   Display Name: {model['display_name']}")
+        print(f"   Description: {model['description'][:80]}...")
         print()
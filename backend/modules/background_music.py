@@ -4,10 +4,14 @@ Manages background music selection and audio mixing
 """
 
 import os
+import functools
 import logging
+import subprocess
 from typing import Optional
 from pathlib import Path
 
+from .lazy_imports import lazy_import, warm_up
+
 logger = logging.getLogger(__name__)
 
 MUSIC_LIBRARY = {
@@ -18,6 +22,10 @@ MUSIC_LIBRARY = {
     "neutral": "neutral.mp3"
 }
 
+# Layout of the pre-decoded .pcm copies kept next to each music track
+MUSIC_PCM_RATE = 44100
+MUSIC_PCM_CHANNELS = 2
+
 def get_music_path(mood: str) -> Optional[str]:
     """
     Get path to background music file for given mood
@@ -45,6 +53,54 @@ def get_music_path(mood: str) -> Optional[str]:
     logger.warning(f"No background music found for mood: {mood}")
     return None
 
+def _pcm_path(music_path) -> Path:
+    """Location of the raw s16le copy of a music track"""
+    return Path(music_path).with_suffix(".pcm")
+
+def _fresh_pcm_path(music_path) -> Optional[str]:
+    """The track's .pcm copy if it exists and is not older than the track itself"""
+    pcm_path = _pcm_path(music_path)
+    try:
+        if pcm_path.stat().st_mtime >= os.path.getmtime(music_path):
+            return str(pcm_path)
+    except OSError:
+        pass
+    return None
+
+def _transcode_to_pcm(music_path) -> None:
+    """Decode a music track once into raw interleaved int16 PCM at MUSIC_PCM_RATE"""
+    pcm_path = _pcm_path(music_path)
+    tmp_path = pcm_path.with_suffix(".pcm.tmp")
+    subprocess.run(
+        [
+            "ffmpeg", "-y",
+            "-i", str(music_path),
+            "-f", "s16le",
+            "-ac", str(MUSIC_PCM_CHANNELS),
+            "-ar", str(MUSIC_PCM_RATE),
+            str(tmp_path)
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    os.replace(tmp_path, pcm_path)
+
+@functools.lru_cache(maxsize=8)
+def _load_music(path: str, mtime: float):
+    """Decode a music track once per (path, mtime); mtime invalidates replaced files"""
+    AudioSegment = lazy_import("pydub", "AudioSegment")
+    
+    pcm_path = _fresh_pcm_path(path)
+    if pcm_path:
+        return AudioSegment(
+            data=Path(pcm_path).read_bytes(),
+            sample_width=2,
+            frame_rate=MUSIC_PCM_RATE,
+            channels=MUSIC_PCM_CHANNELS
+        )
+    return AudioSegment.from_file(path)
+
 def mix_audio_with_music(
     narration_path: str,
     music_path: Optional[str],
@@ -71,13 +127,31 @@ def mix_audio_with_music(
         logger.error(f"Narration file not found: {narration_path}")
         return narration_path
     
+    logger.info(f"Mixing narration with background music...")
+    
     try:
-        from pydub import AudioSegment
-        
-        logger.info(f"Mixing narration with background music...")
+        _mix_with_ffmpeg(narration_path, music_path, output_path, music_volume_reduction_db)
+        logger.info(f"Audio mixed successfully: {output_path}")
+        return output_path
+    except FileNotFoundError:
+        logger.info("ffmpeg not found, mixing in-process")
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"ffmpeg mixing failed ({e}), mixing in-process")
+    
+    try:
+        mix_audio_numpy(narration_path, music_path, output_path, music_volume_reduction_db)
+        logger.info(f"Audio mixed successfully: {output_path}")
+        return output_path
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"NumPy mixing failed ({e}), retrying with pydub")
+    
+    try:
+        AudioSegment = lazy_import("pydub", "AudioSegment")
         
         narration = AudioSegment.from_file(narration_path)
-        music = AudioSegment.from_file(music_path)
+        music = _load_music(music_path, os.path.getmtime(music_path))
         
         music = music - abs(music_volume_reduction_db)
         
@@ -103,6 +177,112 @@ def mix_audio_with_music(
         logger.error(f"Error mixing audio: {e}")
         return narration_path
 
+def mix_audio_numpy(
+    narration_path: str,
+    music_path: str,
+    output_path: str,
+    music_volume_reduction_db: int = 18
+) -> str:
+    """
+    Mix narration with background music in-process using int16 NumPy arithmetic
+    
+    Needs numpy and soundfile. The music is tiled to the narration length, scaled by
+    the dB reduction in Q15 fixed point and added with saturation. MP3 output is
+    encoded with one ffmpeg call; other extensions are written by soundfile.
+    
+    Args:
+        narration_path: Path to narration audio
+        music_path: Path to background music
+        output_path: Path for output mixed audio
+        music_volume_reduction_db: How much to reduce music volume (in dB)
+        
+    Returns:
+        Path to mixed audio file
+    """
+    import numpy as np
+    import soundfile as sf
+    
+    narration, rate = sf.read(narration_path, dtype="int16", always_2d=True)
+    
+    pcm_path = _fresh_pcm_path(music_path)
+    if pcm_path and rate == MUSIC_PCM_RATE:
+        music = np.fromfile(pcm_path, dtype=np.int16).reshape(-1, MUSIC_PCM_CHANNELS)
+    else:
+        music, music_rate = sf.read(music_path, dtype="int16", always_2d=True)
+        if music_rate != rate:
+            raise ValueError(f"sample rates differ ({rate} Hz narration, {music_rate} Hz music)")
+    
+    # Mono tracks are spread to the other track's channel count
+    channels = max(narration.shape[1], music.shape[1])
+    if narration.shape[1] != channels:
+        narration = np.repeat(narration, channels, axis=1) if narration.shape[1] == 1 else None
+    if music.shape[1] != channels:
+        music = np.repeat(music, channels, axis=1) if music.shape[1] == 1 else None
+    if narration is None or music is None:
+        raise ValueError("cannot mix tracks with different multi-channel layouts")
+    
+    frames = len(narration)
+    music = np.tile(music, (-(-frames // len(music)), 1))[:frames]
+    
+    gain_q15 = round(10 ** (-abs(music_volume_reduction_db) / 20) * (1 << 15))
+    mixed = narration.astype(np.int32)
+    mixed += (music.astype(np.int32) * gain_q15) >> 15
+    np.clip(mixed, -32768, 32767, out=mixed)
+    mixed = mixed.astype(np.int16)
+    
+    if Path(output_path).suffix.lower() == ".mp3":
+        subprocess.run(
+            [
+                "ffmpeg", "-y",
+                "-f", "s16le", "-ar", str(rate), "-ac", str(channels), "-i", "-",
+                "-c:a", "libmp3lame",
+                "-f", "mp3",
+                output_path
+            ],
+            input=mixed.tobytes(),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    else:
+        sf.write(output_path, mixed, rate)
+    
+    return output_path
+
+def _mix_with_ffmpeg(narration_path: str, music_path: str, output_path: str, music_volume_reduction_db: int):
+    """
+    Mix in a single ffmpeg pass: loop the music, lower its gain, and lay the narration on top
+    
+    amix runs with normalize=0 so the narration keeps its level, matching pydub's overlay;
+    duration=first cuts the looped music at the end of the narration.
+    """
+    pcm_path = _fresh_pcm_path(music_path)
+    if pcm_path:
+        # Raw PCM input: no MP3 decode for the music track
+        music_input = ["-f", "s16le", "-ar", str(MUSIC_PCM_RATE), "-ac", str(MUSIC_PCM_CHANNELS),
+                       "-stream_loop", "-1", "-i", pcm_path]
+    else:
+        music_input = ["-stream_loop", "-1", "-i", music_path]
+    
+    filter_graph = (
+        f"[1:a]volume=-{abs(music_volume_reduction_db)}dB[m];"
+        "[0:a][m]amix=inputs=2:duration=first:dropout_transition=0:normalize=0"
+    )
+    subprocess.run(
+        [
+            "ffmpeg", "-y",
+            "-i", narration_path,
+            *music_input,
+            "-filter_complex", filter_graph,
+            "-c:a", "libmp3lame",
+            "-f", "mp3",
+            output_path
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
 def create_music_directory():
     """Create music assets directory if it doesn't exist"""
     music_dir = Path("assets/music")
@@ -119,6 +299,20 @@ def create_music_directory():
             f.write("\nSupported formats: MP3, WAV, OGG\n")
             f.write("Recommended: Instrumental, royalty-free music\n")
     
+    # Decode each track to raw PCM once so mixes skip the MP3 decode
+    for filename in MUSIC_LIBRARY.values():
+        music_path = music_dir / filename
+        if not music_path.exists() or _fresh_pcm_path(music_path):
+            continue
+        try:
+            _transcode_to_pcm(music_path)
+        except FileNotFoundError:
+            logger.info("ffmpeg not found, music tracks will be decoded on each mix")
+            break
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Could not pre-decode {filename}: {e}")
+    
     logger.info(f"Music directory ready: {music_dir}")
 
 create_music_directory()
+warm_up(("pydub", "AudioSegment"))
@@ -4,14 +4,55 @@ Analyzes text sentiment and emotion to guide music, voice, and visual choices
 """
 
 import logging
-from typing import Dict, Optional
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+from .lazy_imports import lazy_import
 
 logger = logging.getLogger(__name__)
 
+# Texts per forward pass when several are analyzed together
+EMOTION_BATCH_SIZE = 16
+
+# Characters of each text passed to the models
+MAX_TEXT_CHARS = 512
+
+MUSIC_MOOD_MAP = MappingProxyType({
+    "sadness": "calm",
+    "fear": "calm",
+    "anger": "intense",
+    "joy": "uplifting",
+    "love": "uplifting",
+    "surprise": "energetic",
+    "neutral": "neutral"
+})
+
+COLOR_THEME_MAP = MappingProxyType({
+    "calm": "cool",
+    "uplifting": "warm",
+    "intense": "dark",
+    "energetic": "vibrant",
+    "neutral": "neutral"
+})
+
+# Emotions with a fixed narration style; others fall back to the sentiment
+EMOTION_VOICE_MAP = MappingProxyType({
+    "sadness": "gentle",
+    "fear": "gentle",
+    "joy": "cheerful",
+    "love": "cheerful",
+    "anger": "serious"
+})
+
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
 class EmotionDetector:
     """Detects emotion and sentiment from text using transformer models"""
     
-    def __init__(self):
+    def __init__(self, onnx_cache_dir: str = "./models/emotion_onnx"):
+        self.onnx_cache_dir = Path(onnx_cache_dir)
         self.sentiment_analyzer = None
         self.emotion_classifier = None
         self._initialized = False
@@ -22,20 +63,11 @@ class EmotionDetector:
             return
             
         try:
-            from transformers import pipeline
-            
             logger.info("Loading sentiment analysis model...")
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model="distilbert-base-uncased-finetuned-sst-2-english"
-            )
+            self.sentiment_analyzer = self._load_pipeline("sentiment-analysis", SENTIMENT_MODEL)
             
             logger.info("Loading emotion classification model...")
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                top_k=None
-            )
+            self.emotion_classifier = self._load_pipeline("text-classification", EMOTION_MODEL, top_k=1)
             
             self._initialized = True
             logger.info("Emotion detection models loaded successfully")
@@ -44,6 +76,41 @@ class EmotionDetector:
             logger.error(f"Failed to initialize emotion detection: {e}")
             self._initialized = False
     
+    def _load_pipeline(self, task: str, model_id: str, **kwargs):
+        """
+        Build a classification pipeline, on a dynamically INT8-quantized ONNX export when
+        optimum[onnxruntime] is installed and on the original PyTorch weights otherwise
+        
+        The export and quantization run once; later loads read the cached INT8 model.
+        """
+        pipeline = lazy_import("transformers", "pipeline")
+        
+        try:
+            AutoTokenizer = lazy_import("transformers", "AutoTokenizer")
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError:
+            return pipeline(task, model=model_id, **kwargs)
+        
+        try:
+            quantized_dir = self.onnx_cache_dir / model_id.replace("/", "--")
+            if not (quantized_dir / "model_quantized.onnx").exists():
+                logger.info(f"Exporting {model_id} to INT8 ONNX (one-time)...")
+                onnx_model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+                quantizer = ORTQuantizer.from_pretrained(onnx_model)
+                quantizer.quantize(
+                    save_dir=quantized_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                )
+            
+            model = ORTModelForSequenceClassification.from_pretrained(quantized_dir, file_name="model_quantized.onnx")
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+            return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+            
+        except Exception as e:
+            logger.warning(f"INT8 ONNX load failed for {model_id}, using PyTorch weights: {e}")
+            return pipeline(task, model=model_id, **kwargs)
+    
     def analyze_tone(self, text: str) -> Dict[str, str]:
         """
         Analyze emotional tone of text
@@ -54,75 +121,72 @@ class EmotionDetector:
         Returns:
             Dictionary with sentiment, emotion, music_mood, and color_theme
         """
+        return self.analyze_tone_batch([text])[0]
+    
+    def analyze_tone_batch(self, texts: List[str]) -> List[Dict[str, str]]:
+        """
+        Analyze emotional tone of several texts in batched model passes
+        
+        Args:
+            texts: Input texts to analyze (e.g. script chunks)
+            
+        Returns:
+            One analyze_tone result per text, in input order
+        """
+        if not texts:
+            return []
+        
         if not self._initialized:
             self.initialize()
         
         if not self._initialized:
-            return self._get_default_tone()
+            return [self._get_default_tone() for _ in texts]
         
         try:
-            truncated_text = text[:512]
-            
-            sentiment_result = self.sentiment_analyzer(truncated_text)[0]
-            sentiment = sentiment_result["label"].lower()
+            truncated_texts = [text[:MAX_TEXT_CHARS] for text in texts]
             
-            emotion_results = self.emotion_classifier(truncated_text)[0]
-            top_emotion = sorted(emotion_results, key=lambda x: x["score"], reverse=True)[0]
-            emotion = top_emotion["label"].lower()
+            sentiment_results = self.sentiment_analyzer(truncated_texts, batch_size=EMOTION_BATCH_SIZE)
+            emotion_results = self.emotion_classifier(truncated_texts, batch_size=EMOTION_BATCH_SIZE)
             
-            music_mood = self._determine_music_mood(emotion)
-            color_theme = self._determine_color_theme(music_mood)
-            voice_style = self._determine_voice_style(emotion, sentiment)
-            
-            return {
-                "sentiment": sentiment,
-                "emotion": emotion,
-                "emotion_score": round(top_emotion["score"], 3),
-                "music_mood": music_mood,
-                "color_theme": color_theme,
-                "voice_style": voice_style
-            }
+            # top_k=1 makes the pipeline return only the argmax label per text
+            return [
+                self._build_tone(sentiment_result, top_emotions[0])
+                for sentiment_result, top_emotions in zip(sentiment_results, emotion_results)
+            ]
             
         except Exception as e:
             logger.error(f"Error analyzing tone: {e}")
-            return self._get_default_tone()
+            return [self._get_default_tone() for _ in texts]
+    
+    def _build_tone(self, sentiment_result: Dict, top_emotion: Dict) -> Dict[str, str]:
+        """Combine one text's sentiment and top emotion into a tone result"""
+        sentiment = sentiment_result["label"].lower()
+        emotion = top_emotion["label"].lower()
+        
+        music_mood = self._determine_music_mood(emotion)
+        color_theme = self._determine_color_theme(music_mood)
+        voice_style = self._determine_voice_style(emotion, sentiment)
+        
+        return {
+            "sentiment": sentiment,
+            "emotion": emotion,
+            "emotion_score": round(top_emotion["score"], 3),
+            "music_mood": music_mood,
+            "color_theme": color_theme,
+            "voice_style": voice_style
+        }
     
     def _determine_music_mood(self, emotion: str) -> str:
         """Map emotion to music mood"""
-        mood_map = {
-            "sadness": "calm",
-            "fear": "calm",
-            "anger": "intense",
-            "joy": "uplifting",
-            "love": "uplifting",
-            "surprise": "energetic",
-            "neutral": "neutral"
-        }
-        return mood_map.get(emotion, "neutral")
+        return MUSIC_MOOD_MAP.get(emotion, "neutral")
     
     def _determine_color_theme(self, music_mood: str) -> str:
         """Map music mood to color theme"""
-        color_map = {
-            "calm": "cool",
-            "uplifting": "warm",
-            "intense": "dark",
-            "energetic": "vibrant",
-            "neutral": "neutral"
-        }
-        return color_map.get(music_mood, "neutral")
+        return COLOR_THEME_MAP.get(music_mood, "neutral")
     
     def _determine_voice_style(self, emotion: str, sentiment: str) -> str:
         """Determine recommended voice narration style"""
-        if emotion in ["sadness", "fear"]:
-            return "gentle"
-        elif emotion in ["joy", "love"]:
-            return "cheerful"
-        elif emotion == "anger":
-            return "serious"
-        elif sentiment == "positive":
-            return "friendly"
-        else:
-            return "neutral"
+        return EMOTION_VOICE_MAP.get(emotion) or ("friendly" if sentiment == "positive" else "neutral")
     
     def _get_default_tone(self) -> Dict[str, str]:
         """Return default tone when analysis fails"""
@@ -149,3 +213,16 @@ def analyze_tone(text: str) -> Dict[str, str]:
         Emotion analysis results
     """
     return _detector.analyze_tone(text)
+
+
+def analyze_tone_batch(texts: List[str]) -> List[Dict[str, str]]:
+    """
+    Convenience function for batched emotion analysis
+    
+    Args:
+        texts: Texts to analyze
+        
+    Returns:
+        Emotion analysis results, one per text
+    """
+    return _detector.analyze_tone_batch(texts)
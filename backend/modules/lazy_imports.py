@@ -0,0 +1,67 @@
+"""
+Lazy Import Helper
+Resolves optional heavy dependencies once, on first use or from a background warm-up
+"""
+
+import importlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_resolved: Dict[Tuple[str, Optional[str]], Any] = {}
+_missing: Dict[Tuple[str, Optional[str]], str] = {}
+
+def lazy_import(module: str, attr: Optional[str] = None) -> Any:
+    """
+    Import a module (or one attribute of it) the first time it is needed
+    
+    Later calls return the cached object without touching the import machinery;
+    a missing dependency is remembered so it is not searched for again.
+    
+    Args:
+        module: Dotted module name (e.g. 'deep_translator')
+        attr: Optional attribute to return from the module (e.g. 'GoogleTranslator')
+    
+    Returns:
+        The module or attribute
+    
+    Raises:
+        ImportError: If the module or attribute is not available
+    """
+    key = (module, attr)
+    try:
+        return _resolved[key]
+    except KeyError:
+        pass
+    
+    if key in _missing:
+        raise ImportError(_missing[key])
+    
+    try:
+        value = importlib.import_module(module)
+        if attr is not None:
+            value = getattr(value, attr)
+    except (ImportError, AttributeError) as e:
+        _missing[key] = str(e)
+        raise ImportError(str(e)) from e
+    
+    _resolved[key] = value
+    return value
+
+def warm_up(*specs: Tuple[str, Optional[str]]) -> None:
+    """
+    Import dependencies on a daemon thread so the first request does not pay for them
+    
+    Args:
+        specs: (module, attr) pairs as accepted by lazy_import
+    """
+    def run():
+        for module, attr in specs:
+            try:
+                lazy_import(module, attr)
+            except ImportError:
+                logger.debug(f"Optional dependency not available: {module}")
+    
+    threading.Thread(target=run, name="import-warm-up", daemon=True).start()
@@ -4,10 +4,25 @@ Provides translation and language-specific voice selection
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Dict, Optional
 
+from .lazy_imports import lazy_import, warm_up
+
 logger = logging.getLogger(__name__)
 
+warm_up(("deep_translator", "GoogleTranslator"))
+
+# Chunks of one long text translated concurrently (each is one HTTPS round-trip)
+TRANSLATE_WORKERS = 8
+
+# GoogleTranslator keeps per-request state on the instance, so each thread gets its own
+_translators = threading.local()
+_translate_pool = None
+_translate_pool_lock = threading.Lock()
+
 SUPPORTED_LANGUAGES = {
     "en": {
         "name": "English",
@@ -71,6 +86,58 @@ SUPPORTED_LANGUAGES = {
     }
 }
 
+# Flat views of SUPPORTED_LANGUAGES for the per-request lookups
+_DEFAULT_VOICE = MappingProxyType({code: info["default_voice"] for code, info in SUPPORTED_LANGUAGES.items()})
+_LANG_INFO = MappingProxyType(SUPPORTED_LANGUAGES)
+
+# Google Translate codes that differ from ours
+_GOOGLE_LANG_CODES = MappingProxyType({
+    "zh": "zh-CN"  # Chinese Simplified
+})
+
+def _get_translator(target: str):
+    """This thread's cached GoogleTranslator for a target language"""
+    GoogleTranslator = lazy_import("deep_translator", "GoogleTranslator")
+    
+    by_target = getattr(_translators, "by_target", None)
+    if by_target is None:
+        by_target = _translators.by_target = {}
+    translator = by_target.get(target)
+    if translator is None:
+        translator = by_target[target] = GoogleTranslator(source='auto', target=target)
+    return translator
+
+def _get_translate_pool() -> ThreadPoolExecutor:
+    """Shared worker pool for concurrent chunk translation, created on first use"""
+    global _translate_pool
+    if _translate_pool is None:
+        with _translate_pool_lock:
+            if _translate_pool is None:
+                _translate_pool = ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS,
+                                                     thread_name_prefix="translate")
+    return _translate_pool
+
+def _split_into_chunks(text: str, max_chunk_size: int):
+    """
+    Split text into chunks of at most max_chunk_size characters in one linear scan
+    
+    Each chunk ends at the last '. ' inside its window, or is cut at the limit when
+    the window holds no sentence boundary.
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chunk_size, len(text))
+        if end < len(text):
+            cut = text.rfind('. ', start, end)
+            if cut > start:
+                end = cut + 2
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
 def translate_text(text: str, target_language: str, source_language: str = "auto") -> str:
     """
     Translate text to target language
@@ -87,25 +154,9 @@ def translate_text(text: str, target_language: str, source_language: str = "auto
         return text
     
     try:
-        from deep_translator import GoogleTranslator
-        
-        lang_map = {
-            "hi": "hi",  # Hindi
-            "ta": "ta",  # Tamil
-            "kn": "kn",  # Kannada
-            "te": "te",  # Telugu
-            "ml": "ml",  # Malayalam
-            "es": "es",  # Spanish
-            "fr": "fr",  # French
-            "de": "de",  # German
-            "ja": "ja",  # Japanese
-            "zh": "zh-CN",  # Chinese Simplified
-            "ar": "ar"   # Arabic
-        }
-        
-        google_lang_code = lang_map.get(target_language, target_language)
+        google_lang_code = _GOOGLE_LANG_CODES.get(target_language, target_language)
         
-        translator = GoogleTranslator(source='auto', target=google_lang_code)
+        translator = _get_translator(google_lang_code)
         
         max_chunk_size = 4500
         if len(text) <= max_chunk_size:
@@ -117,25 +168,12 @@ def translate_text(text: str, target_language: str, source_language: str = "auto
                 logger.warning(f"Translation returned same text for {target_language}")
                 return text
         
-        chunks = []
-        sentences = text.split('. ')
-        current_chunk = ""
+        chunks = _split_into_chunks(text, max_chunk_size)
         
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < max_chunk_size:
-                current_chunk += sentence + ". "
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + ". "
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        translated_chunks = []
-        for chunk in chunks:
-            translated_chunk = translator.translate(chunk)
-            translated_chunks.append(translated_chunk)
+        # Chunks are independent requests; map keeps them in order
+        translated_chunks = list(_get_translate_pool().map(
+            lambda chunk: _get_translator(google_lang_code).translate(chunk), chunks
+        ))
         
         translated_text = " ".join(translated_chunks)
         logger.info(f"✓ Translated {len(chunks)} chunks to {target_language}")
@@ -162,12 +200,7 @@ def get_voice_for_language(language: str, voice_style: str = "neutral") -> str:
     Returns:
         Voice name for Edge TTS
     """
-    if language not in SUPPORTED_LANGUAGES:
-        language = "en"
-    
-    lang_config = SUPPORTED_LANGUAGES[language]
-    
-    return lang_config["default_voice"]
+    return _DEFAULT_VOICE.get(language, _DEFAULT_VOICE["en"])
 
 def get_language_info(language: str) -> Dict[str, any]:
     """
@@ -179,7 +212,7 @@ def get_language_info(language: str) -> Dict[str, any]:
     Returns:
         Language configuration dictionary
     """
-    return SUPPORTED_LANGUAGES.get(language, SUPPORTED_LANGUAGES["en"])
+    return _LANG_INFO.get(language, _LANG_INFO["en"])
 
 def get_supported_languages() -> Dict[str, str]:
     """
@@ -9,6 +9,14 @@ from typing import List, Dict
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundary: whitespace that follows terminal punctuation
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'\S+')
+
+def _word_count(text: str) -> int:
+    """Count whitespace-separated words without building a token list"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
 def split_script_to_scenes(text: str, max_words_per_scene: int = 50) -> List[Dict[str, any]]:
     """
     Split script into logical scenes based on sentence boundaries
@@ -21,7 +29,7 @@ def split_script_to_scenes(text: str, max_words_per_scene: int = 50) -> List[Dic
         List of scene dictionaries with text and metadata
     """
     try:
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+        sentences = _SENT_SPLIT_RE.split(text.strip())
         
         scenes = []
         current_scene = ""
@@ -33,7 +41,7 @@ def split_script_to_scenes(text: str, max_words_per_scene: int = 50) -> List[Dic
             if not sentence:
                 continue
             
-            sentence_words = len(sentence.split())
+            sentence_words = _word_count(sentence)
             
             if current_word_count + sentence_words > max_words_per_scene and current_scene:
                 scenes.append({
@@ -62,11 +70,12 @@ def split_script_to_scenes(text: str, max_words_per_scene: int = 50) -> List[Dic
         
     except Exception as e:
         logger.error(f"Error splitting script: {e}")
+        word_count = _word_count(text)
         return [{
             "scene_number": 1,
             "text": text,
-            "word_count": len(text.split()),
-            "estimated_duration": estimate_duration(len(text.split()))
+            "word_count": word_count,
+            "estimated_duration": estimate_duration(word_count)
         }]
 
 def estimate_duration(word_count: int, words_per_minute: int = 140) -> float: